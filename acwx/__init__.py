@@ -4,3 +4,4 @@
 __version__ = "0.2.0~pre"
 
 from acwx.util                      import *
+from acwx.stash                     import *
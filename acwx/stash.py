@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""Caching layers for application stashes (persistent key/value settings)"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+__all__ = 'StashCache WriteBehindStash SQLiteStash'.split()
+
+import atexit, json, sqlite3, threading, weakref
+from timeit import default_timer
+
+
+def _json_copy(value):
+    """Copy of a decoded JSON value (only containers need copying)"""
+    if isinstance(value, dict):
+        return { k: _json_copy(v) for k, v in value.items() }
+    if isinstance(value, list):
+        return [ _json_copy(v) for v in value ]
+    return value
+
+
+class StashCache(object):
+    """Read-through cache in front of a stash.
+
+    A stash is any object with C{get(key, dflt)} and C{set(key, value)}
+    methods. Values read are kept in-process, together with their decoded
+    JSON for C{get_json()}, so that repeated reads cost neither a backend
+    query nor a C{json.loads}. Writes go through to the stash and update
+    the cache. Callers get their own copy of decoded JSON containers, so
+    modifying a result does not change the cache.
+
+    Stashes providing C{prefixed(prefix)} (returning a dict of all keys
+    starting with prefix) support C{preload()}, which fetches a whole
+    namespace in one call; keys of a preloaded namespace missing from the
+    stash are then known to be absent without further queries.
+
+    The cache only sees writes made through it. After writing to the
+    stash directly (or when another process changes it), call
+    C{invalidate(namespace)}; in particular, keys added behind the cache's
+    back to a preloaded namespace are otherwise reported absent.
+
+    Use C{StashCache.of(stash)} so that all users of a stash share (and
+    keep coherent) one cache. Shared caches only hold a weak reference to
+    their stash, so that they go away together with it. Stashes which
+    cannot be weakly referenced (or hashed), such as a plain dict, get a
+    shared cache which keeps them alive.
+
+    @param weak: hold the stash by weak reference only
+    """
+    _shared = weakref.WeakKeyDictionary()
+    _strong = dict() # id(stash) -> cache, for stashes without weak references
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def of(cls, stash):
+        """The shared cache of a stash (stash may itself be a cache)"""
+        if isinstance(stash, StashCache):
+            return stash
+        with cls._shared_lock:
+            try:
+                cache = cls._shared.get(stash)
+                if cache is None:
+                    cache = cls._shared[stash] = cls(stash, weak=True)
+            except TypeError:
+                # The cache holds the stash, so its id is not reused
+                cache = cls._strong.get(id(stash))
+                if cache is None:
+                    cache = cls._strong[id(stash)] = cls(stash)
+            return cache
+
+    def __init__(self, stash, weak=False):
+        self._stash = weakref.ref(stash) if weak else (lambda: stash)
+        self._raw  = dict() # key -> value, None when absent
+        self._json = dict() # key -> (raw value, decoded value)
+        self._preloaded = []
+        self._lock = threading.RLock()
+
+    @property
+    def stash(self):
+        stash = self._stash()
+        if stash is None:
+            raise ReferenceError("The stash of this cache no longer exists")
+        return stash
+
+    def get(self, key, dflt=None):
+        try:
+            value = self._raw[key]
+        except KeyError:
+            if any(key.startswith(ns) for ns in self._preloaded):
+                value = None
+            else:
+                value = self.stash.get(key, None)
+            with self._lock:
+                self._raw[key] = value
+        return dflt if value is None else value
+
+    def set(self, key, value):
+        rv = self.stash.set(key, value)
+        with self._lock:
+            self._raw[key] = value
+            self._json.pop(key, None)
+        return rv
+
+    def get_json(self, key, dflt=None):
+        value = self.get(key, None)
+        return dflt if value is None else self.decode(key, value)
+
+    def decode(self, key, value):
+        """Decoded JSON of the raw value of key (decoded once per raw value)"""
+        try:
+            raw, decoded = self._json[key]
+        except KeyError:
+            raw = None
+        if raw != value:
+            decoded = json.loads(value)
+            with self._lock:
+                self._json[key] = (value, decoded)
+        return _json_copy(decoded)
+
+    def set_json(self, key, value):
+        return self.set(key, None if value is None else json.dumps(value, separators=(',',':')))
+
+    def preload(self, namespace):
+        """Fetch all values of a namespace (key prefix) in one call.
+
+        Returns the number of values fetched, or None when the stash has no
+        bulk access.
+        """
+        prefixed = getattr(self.stash, 'prefixed', None)
+        if prefixed is None:
+            return None
+        try:
+            values = prefixed(namespace)
+        except NotImplementedError:
+            return None
+        with self._lock:
+            for key in [ k for k in self._raw if k.startswith(namespace) ]:
+                del self._raw[key]
+                self._json.pop(key, None)
+            self._raw.update(values)
+            if namespace not in self._preloaded:
+                self._preloaded.append(namespace)
+        return len(values)
+
+    def invalidate(self, namespace=""):
+        """Forget cached values (of a namespace), e.g., after outside changes"""
+        with self._lock:
+            for key in [ k for k in self._raw if k.startswith(namespace) ]:
+                del self._raw[key]
+            for key in [ k for k in self._json if k.startswith(namespace) ]:
+                del self._json[key]
+            self._preloaded = [ ns for ns in self._preloaded if not ns.startswith(namespace) ]
+
+
+class WriteBehindStash(object):
+    """Debounced, batched stash writes on a worker thread.
+
+    C{set()} only records the value (the last value per key wins) and
+    returns at once. The worker writes the pending values once no write
+    arrived for C{delay} seconds, or at the latest C{max_delay} seconds
+    after the first pending write, using the stash's C{set_many(items)}
+    (a single transaction) when available. Reads see pending values.
+
+    C{flush()} writes synchronously; C{close()} stops the worker and
+    flushes, and is registered to run at interpreter exit so that no
+    write is lost on shutdown. Failed writes are retried (newer values
+    win) and recorded in C{error}; C{stats} counts sets, coalesced
+    (overwritten pending) values, flushes, written values and errors.
+    """
+    def __init__(self, stash, delay=0.5, max_delay=None, clock=default_timer):
+        self.stash = stash
+        self.delay = delay
+        self.max_delay = max_delay if max_delay is not None else 10*delay
+        self.clock = clock
+        self.stats = dict(sets=0, coalesced=0, flushes=0, written=0, errors=0)
+        self.error = None
+        self._pending  = dict()
+        self._flushing = dict()
+        self._first = self._last = None # times of the first / latest pending write
+        self._closed = False
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="stash-writer")
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.close)
+
+    def get(self, key, dflt=None):
+        with self._cond:
+            for values in (self._pending, self._flushing):
+                if key in values:
+                    value = values[key]
+                    return dflt if value is None else value
+        return self.stash.get(key, dflt)
+
+    def set(self, key, value):
+        with self._cond:
+            if not self._closed:
+                if key in self._pending:
+                    self.stats['coalesced'] += 1
+                self._pending[key] = value
+                self.stats['sets'] += 1
+                self._last = self.clock()
+                if self._first is None:
+                    self._first = self._last
+                self._cond.notify()
+                return
+        self.stash.set(key, value)# Closed: write through
+
+    def prefixed(self, prefix):
+        """Values of all keys starting with prefix (when the stash supports it)"""
+        if not hasattr(self.stash, 'prefixed'):
+            raise NotImplementedError("{} has no bulk access".format(type(self.stash).__name__))
+        values = self.stash.prefixed(prefix)
+        with self._cond:
+            for pending in (self._flushing, self._pending):
+                for key, value in pending.items():
+                    if key.startswith(prefix):
+                        if value is None:
+                            values.pop(key, None)
+                        else:
+                            values[key] = value
+        return values
+
+    def flush(self):
+        """Write all pending values now (in the calling thread). Returns the number written."""
+        with self._write_lock:
+            with self._cond:
+                items, self._pending = self._pending, dict()
+                self._flushing = items
+                self._first = self._last = None
+            if not items:
+                return 0
+            try:
+                set_many = getattr(self.stash, 'set_many', None)
+                if set_many is not None:
+                    set_many(items)
+                else:
+                    for key, value in items.items():
+                        self.stash.set(key, value)
+            except Exception as err:
+                with self._cond:
+                    self.error = err
+                    self.stats['errors'] += 1
+                    for key, value in items.items():
+                        self._pending.setdefault(key, value)
+                    self._first = self._last = self.clock()
+                    self._flushing = dict()
+                return 0
+            with self._cond:
+                self._flushing = dict()
+                self.stats['flushes'] += 1
+                self.stats['written'] += len(items)
+            return len(items)
+
+    def close(self):
+        """Stop the worker and write everything still pending"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    if not self._pending:
+                        self._cond.wait()
+                        continue
+                    due = min(self._last + self.delay, self._first + self.max_delay)
+                    wait = due - self.clock()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+            self.flush()
+
+
+class SQLiteStash(object):
+    """Stash in an SQLite database.
+
+    A small local stand-in for the application stash (e.g., for tests and
+    benchmarks), with the bulk operations used by L{StashCache} and
+    L{WriteBehindStash}. Setting a value to None deletes the key.
+    """
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS stash (key TEXT PRIMARY KEY, value TEXT)")
+
+    def get(self, key, dflt=None):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM stash WHERE key = ?", (key,)).fetchone()
+        return dflt if row is None or row[0] is None else row[0]
+
+    def set(self, key, value):
+        self.set_many({ key: value })
+
+    def set_many(self, items):
+        """Write several values in one transaction"""
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM stash WHERE key = ?", [ (k,) for k, v in items.items() if v is None ])
+            self._db.executemany("INSERT OR REPLACE INTO stash (key, value) VALUES (?, ?)", [ (k, v) for k, v in items.items() if v is not None ])
+
+    def prefixed(self, prefix):
+        with self._lock:
+            rows = self._db.execute("SELECT key, value FROM stash WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -6,9 +6,12 @@
 # This program is free software: you can redistribute it and/or modify it
 # under the terms of the MIT (Expat) license.
 from __future__ import division, absolute_import, print_function, unicode_literals
-__all__ = 'ContextualCounter cached_property'.split()
+__all__ = 'ContextualCounter LRUCache memoize cached_property locked_cached_property slot_cached_property invalidate populated_caches'.split()
 
-import weakref
+import functools, threading, weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer
 
 
 
@@ -41,6 +44,135 @@ class ContextualCounter(object):
         return self.depth
 
 
+class LRUCache(object):
+    """Bounded mapping with least-recently-used and time-to-live eviction.
+
+    Once C{maxsize} entries are stored, inserting evicts the least recently
+    used entry. With a C{ttl} (seconds), entries also expire that long
+    after insertion (expired entries are dropped when next looked up).
+    C{stats} counts hits, misses, evictions and expirations; pass a dict
+    to share the counters between several caches.
+    """
+    def __init__(self, maxsize=128, ttl=None, clock=default_timer, stats=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = stats if stats is not None else dict(hits=0, misses=0, evictions=0, expirations=0)
+        self._data = OrderedDict() # key -> (expires, value), oldest first
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data.pop(key)
+            except KeyError:
+                self.stats['misses'] += 1
+                return default
+            if expires is not None and self.clock() >= expires:
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return default
+            self._data[key] = (expires, value)
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (None if self.ttl is None else self.clock() + self.ttl, value)
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def discard_if(self, test):
+        """Drop the entries whose key passes test(key)"""
+        with self._lock:
+            for key in [ k for k in self._data if test(k) ]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_MISSING = object()
+
+def memoize(maxsize=128, ttl=None, per_instance=False, weak=False, clock=default_timer):
+    """Memoizing decorator for functions and methods with bounded caches.
+
+        @memoize(maxsize=256, ttl=60)
+        def permission(self, user, action):
+            ...
+
+    Results are cached by the (hashable) call arguments in an L{LRUCache};
+    calls with unhashable arguments are not cached. The decorated function
+    has C{cache_info()} (counters, current size and settings, for sizing
+    caches from production data) and C{cache_clear()}. The function may run
+    more than once for the same arguments when called concurrently.
+
+    May be used bare (C{@memoize}) for the defaults.
+
+    @param maxsize: maximum entries per cache (None: unbounded)
+    @param ttl: seconds after which entries expire (None: never)
+    @param per_instance: keep a separate cache for each value of the first
+        argument (usually C{self}), held in a weak-keyed dictionary so that
+        the cache goes away with its instance. Otherwise, a single cache is
+        shared by all calls.
+    @param weak: in a shared cache, hold the first argument by weak
+        reference; entries are dropped when it is garbage collected
+    """
+    if callable(maxsize):
+        return memoize()(maxsize)
+
+    def decorate(func):
+        stats = dict(hits=0, misses=0, evictions=0, expirations=0)
+        shared = None if per_instance else LRUCache(maxsize, ttl, clock, stats)
+        caches = weakref.WeakKeyDictionary()
+
+        def collect(ref):
+            shared.discard_if(lambda key: key[0] is ref)
+
+        def lookup(args, kwargs):
+            """C{(cache, key)} for a call"""
+            kw = tuple(sorted(kwargs.items())) if kwargs else ()
+            if shared is None:
+                cache = caches.get(args[0])
+                if cache is None:
+                    cache = caches.setdefault(args[0], LRUCache(maxsize, ttl, clock, stats))
+                return cache, (args[1:], kw)
+            if weak:
+                return shared, (weakref.ref(args[0], collect), args[1:], kw)
+            return shared, (args, kw)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                cache, key = lookup(args, kwargs)
+                value = cache.get(key, _MISSING)
+            except TypeError:# Unhashable (or not weakly referenceable) arguments
+                return func(*args, **kwargs)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+            return value
+
+        def cache_info():
+            size = len(shared) if shared is not None else sum(len(c) for c in list(caches.values()))
+            return dict(stats, size=size, maxsize=maxsize, ttl=ttl, caches=(1 if shared is not None else len(caches)))
+
+        def cache_clear():
+            for cache in ([shared] if shared is not None else list(caches.values())):
+                cache.clear()
+
+        wrapper.cache_info  = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorate
+
+
 class cached_property(object):
     '''Computes attribute value and caches it in the instance.
 
@@ -51,11 +183,21 @@ class cached_property(object):
     Author: Denis Otkidach  http://stackoverflow.com/users/168352/denis-otkidach
     Extended by: http://stackoverflow.com/questions/3237678/how-to-create-decorator-for-lazy-initialization-of-a-property
     Further extended by Dean Serenevy for APCI LLC.
+
+    Cached properties may declare the attributes they are computed from:
+
+        @cached_property(depends=('fig', 'v_formatter'))
+        def axes(self):
+            ...
+
+    Deleting (or assigning) a cached value then also drops every cached
+    value derived from it, directly or indirectly, see L{invalidate}.
     '''
-    def __init__(self, method=None, name=None, weak=False, debug=False):
+    def __init__(self, method=None, name=None, weak=False, debug=False, depends=()):
         self.name = name
         self.debug = debug
         self.weak = weak
+        self.depends = tuple(depends.split() if hasattr(depends, 'split') else depends)
         if method is not None:
             self(method)
 
@@ -71,22 +213,193 @@ class cached_property(object):
         elif self.name in inst.__dict__:
             value = inst.__dict__[self.name]
         else:
-            value = self.method(inst)
-            if self.weak:
-                try:
-                    value = weakref.ref(value)
-                except TypeError:
-                    pass
-            inst.__dict__[self.name] = value
+            value = inst.__dict__[self.name] = self.compute(inst)
 
         return value() if self.weak and isinstance(value, weakref.ref) else value
 
+    def compute(self, inst):
+        """Call the method. Returns the value to cache (a weakref if weak)"""
+        value = self.method(inst)
+        if self.weak:
+            try:
+                value = weakref.ref(value)
+            except TypeError:
+                pass
+        return value
+
+    def is_cached(self, inst):
+        return self.name in inst.__dict__
+
+    def clear(self, inst):
+        """Drop the cached value (only this one, see L{invalidate})"""
+        inst.__dict__.pop(self.name, None)
+
     def __set__(self, inst, value):
         if self.weak:
             inst.__dict__[self.name] = weakref.ref(value)
         else:
             inst.__dict__[self.name] = value
+        _invalidate(inst, _cache_map(type(inst))[1].get(self.name, ()))
 
     def __delete__(self,inst):
-        if self.name in inst.__dict__:
-            del inst.__dict__[self.name]
+        invalidate(inst, self.name)
+
+
+class _MissLocks(object):
+    """Per-instance locks of one cached attribute, held while its value is computed.
+
+    A lock only exists while some thread computes (or waits for) the value
+    of an instance, and that thread keeps the instance alive, so the locks
+    can be keyed by instance id and nothing is left in the instance.
+    """
+    def __init__(self):
+        self._locks = dict()
+
+    @contextmanager
+    def __call__(self, inst):
+        key = id(inst)
+        # dict.setdefault is atomic, so all threads agree on the lock
+        lock = self._locks.setdefault(key, threading.RLock())
+        try:
+            with lock:
+                yield
+        finally:
+            if self._locks.get(key) is lock:
+                self._locks.pop(key, None)
+
+
+class locked_cached_property(cached_property):
+    """Thread-safe L{cached_property}.
+
+    Hits cost the same as for cached_property (a single dictionary lookup,
+    no locking). On a miss, the method runs while holding a lock private to
+    the instance and attribute and the cache is checked again once the
+    lock is held, so concurrent first accesses compute the value only once
+    while other attributes (and instances) are not blocked.
+    """
+    def __init__(self, method=None, name=None, weak=False, debug=False, depends=()):
+        self.locks = _MissLocks()
+        super(locked_cached_property,self).__init__(method, name, weak, debug, depends)
+
+    def __get__(self, inst, cls):
+        if inst is None:
+            return self
+        d = inst.__dict__
+        if self.name in d:
+            value = d[self.name]
+        else:
+            with self.locks(inst):
+                if self.name in d:
+                    value = d[self.name]
+                else:
+                    value = d[self.name] = self.compute(inst)
+
+        return value() if self.weak and isinstance(value, weakref.ref) else value
+
+
+class slot_cached_property(cached_property):
+    """L{cached_property} for classes using C{__slots__}.
+
+    The value is stored in a slot, by default C{"_" + name}, which the
+    class must declare:
+
+        class Point(object):
+            __slots__ = 'x y _norm'.split()
+
+            @slot_cached_property
+            def norm(self):
+                return math.hypot(self.x, self.y)
+
+    @param slot: name of the slot holding the value
+    @param lock: when true, misses are computed under a per-instance and
+        attribute lock with double-checked lookup, see L{locked_cached_property}
+    """
+    def __init__(self, method=None, name=None, weak=False, debug=False, depends=(), slot=None, lock=False):
+        self.slot = slot
+        self.locks = _MissLocks() if lock else None
+        super(slot_cached_property,self).__init__(method, name, weak, debug, depends)
+
+    def __call__(self, method):
+        super(slot_cached_property,self).__call__(method)
+        self.slot = self.slot if self.slot is not None else "_" + self.name
+        return self
+
+    def __get__(self, inst, cls):
+        if inst is None:
+            return self
+        try:
+            value = getattr(inst, self.slot)
+        except AttributeError:
+            if self.locks is None:
+                value = self.compute(inst)
+                setattr(inst, self.slot, value)
+            else:
+                with self.locks(inst):
+                    try:
+                        value = getattr(inst, self.slot)
+                    except AttributeError:
+                        value = self.compute(inst)
+                        setattr(inst, self.slot, value)
+
+        return value() if self.weak and isinstance(value, weakref.ref) else value
+
+    def __set__(self, inst, value):
+        setattr(inst, self.slot, weakref.ref(value) if self.weak else value)
+        _invalidate(inst, _cache_map(type(inst))[1].get(self.name, ()))
+
+    def clear(self, inst):
+        if self.is_cached(inst):
+            delattr(inst, self.slot)
+
+    def is_cached(self, inst):
+        return hasattr(inst, self.slot)
+
+
+_CACHE_MAPS = weakref.WeakKeyDictionary()
+
+def _cache_map(cls):
+    """C{({ attribute: cached_property }, { attribute: set(dependent attributes) })} of a class"""
+    try:
+        return _CACHE_MAPS[cls]
+    except KeyError:
+        pass
+    attrs = dict()
+    for klass in reversed(cls.__mro__):
+        attrs.update(vars(klass))
+    props = dict( (k, v) for k, v in attrs.items() if isinstance(v, cached_property) )
+    dependents = dict()
+    for attr, prop in props.items():
+        for dep in prop.depends:
+            dependents.setdefault(dep, set()).add(attr)
+    _CACHE_MAPS[cls] = (props, dependents)
+    return props, dependents
+
+def _invalidate(inst, names):
+    props, dependents = _cache_map(type(inst))
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        prop = props.get(name)
+        # Nothing can have been derived from an unpopulated cache (this also ends cycles)
+        if prop is not None and prop.is_cached(inst):
+            prop.clear(inst)
+            todo.extend(dependents.get(name, ()))
+
+def invalidate(inst, *names):
+    """Drop cached values and all cached values derived from them.
+
+    Names may also be plain attributes listed in some C{depends}, for
+    instance to drop the caches derived from an attribute after changing
+    it. Only populated caches are visited, so the cost is proportional to
+    the number of values actually dropped.
+    """
+    props, dependents = _cache_map(type(inst))
+    for name in names:
+        prop = props.get(name)
+        if prop is not None:
+            prop.clear(inst)
+        _invalidate(inst, dependents.get(name, ()))
+
+def populated_caches(inst):
+    """Sorted names of the cached properties currently holding a value"""
+    return sorted( name for name, prop in _cache_map(type(inst))[0].items() if prop.is_cached(inst) )
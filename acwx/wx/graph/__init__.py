@@ -4,4 +4,12 @@
 from __future__ import division, absolute_import, print_function, unicode_literals
 
 from acwx.wx.graph.graph            import *
+from acwx.wx.graph.autoscale        import *
+from acwx.wx.graph.decimate         import *
+from acwx.wx.graph.ingest           import *
+from acwx.wx.graph.loader           import *
+from acwx.wx.graph.lod              import *
 from acwx.wx.graph.series           import *
+from acwx.wx.graph.shared           import *
+from acwx.wx.graph.storage          import *
+from acwx.wx.graph.threaded         import *
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Quantized axis autoscaling with hysteresis"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+__all__ = 'QuantizedScale nice_step'.split()
+
+import math
+from timeit import default_timer
+
+NICE_STEPS = (1, 2, 2.5, 5, 10)
+
+
+def nice_step(raw):
+    """Smallest "nice" number (1, 2, 2.5 or 5 times a power of 10) >= raw"""
+    if not raw > 0:
+        return 1
+    scale = 10 ** math.floor(math.log10(raw))
+    return next(s for s in NICE_STEPS if s * scale >= raw * (1 - 1e-9)) * scale
+
+
+class QuantizedScale(object):
+    """Axis limits which only change in steps.
+
+    The limits grow (immediately) when the data leave them, to the data
+    range plus C{headroom} (a fraction of the range) rounded outward to a
+    multiple of a nice tick step. The limits only shrink once tighter
+    limits would have been chosen for C{shrink_delay} seconds in a row.
+    Thus, axis changes (and the re-layout and full redraw they cause) are
+    rare events rather than happening on almost every frame.
+
+    @param ticks: approximate number of tick steps across the axis
+    """
+    def __init__(self, headroom=0.1, shrink_delay=2.0, ticks=5, clock=default_timer):
+        self.headroom = headroom
+        self.shrink_delay = shrink_delay
+        self.ticks = ticks
+        self.clock = clock
+        self.lo = self.hi = None
+        self._shrink_since = None
+
+    def target(self, lo, hi):
+        """Quantized limits for data spanning [lo, hi]"""
+        span = hi - lo
+        if not span > 0:
+            span = abs(lo) or 1
+        pad  = span * self.headroom
+        step = nice_step((span + 2*pad) / self.ticks)
+        return math.floor((lo - pad) / step) * step, math.ceil((hi + pad) / step) * step
+
+    def __call__(self, lo, hi):
+        """Returns the limits to use for data spanning [lo, hi]"""
+        if not (_finite(lo) and _finite(hi)):
+            return lo, hi
+
+        if self.lo is None or lo < self.lo or hi > self.hi:
+            self.lo, self.hi = self.target(lo, hi)
+            self._shrink_since = None
+            return self.lo, self.hi
+
+        target = self.target(lo, hi)
+        if target == (self.lo, self.hi):
+            self._shrink_since = None
+        else:
+            now = self.clock()
+            if self._shrink_since is None:
+                self._shrink_since = now
+            elif now - self._shrink_since >= self.shrink_delay:
+                self.lo, self.hi = target
+                self._shrink_since = None
+        return self.lo, self.hi
+
+    def reset(self):
+        self.lo = self.hi = None
+        self._shrink_since = None
+
+
+def _finite(x):
+    return x is not None and not (math.isinf(x) or math.isnan(x))
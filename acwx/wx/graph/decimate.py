@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Pixel-aware decimation of plot data"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+__all__ = 'm4 lttb'.split()
+
+import numpy
+
+
+def _segment_arg(values, starts, seg_id, reducer):
+    """Index of the first min/max (per reducer) of each segment of values.
+
+    Segments consisting entirely of NaN have no entry in the result.
+    """
+    best = reducer.reduceat(values, starts)
+    hits = numpy.flatnonzero(values == best[seg_id])
+    _, first = numpy.unique(seg_id[hits], return_index=True)
+    return hits[first]
+
+
+def m4(X, Y, width):
+    """M4 decimation: first, last, min and max point of each pixel column.
+
+    Reduces monotonic X data to at most 4 points per pixel while preserving
+    the rendered envelope exactly. Data which are already small enough are
+    returned unchanged.
+
+    @param width: number of pixel columns spanned by the x-range of the data
+    """
+    n = len(X)
+    if n <= 4*width or width < 1:
+        return X, Y
+    X, Y = numpy.asarray(X, dtype=float), numpy.asarray(Y, dtype=float)
+    x0, x1 = X[0], X[-1]
+    if not x1 > x0:
+        return X, Y
+
+    col = ((X - x0) * (width / (x1 - x0))).astype(numpy.intp)
+    numpy.clip(col, 0, width-1, out=col)
+    starts = numpy.append(0, numpy.flatnonzero(numpy.diff(col)) + 1)
+    ends   = numpy.append(starts[1:], n) - 1
+    seg_id = numpy.repeat(numpy.arange(len(starts)), numpy.diff(numpy.append(starts, n)))
+
+    idx = numpy.unique(numpy.concatenate((
+        starts, ends,
+        _segment_arg(Y, starts, seg_id, numpy.fmin),
+        _segment_arg(Y, starts, seg_id, numpy.fmax),
+    )))
+    return X[idx], Y[idx]
+
+
+def lttb(X, Y, threshold):
+    """Largest-Triangle-Three-Buckets decimation to about threshold points.
+
+    Vectorized variant: each bucket keeps the point forming the largest
+    triangle with the I{average} points of its neighboring buckets (rather
+    than the previously selected point) so that all buckets are evaluated
+    at once. The first and last points are always kept.
+    """
+    n = len(X)
+    if n <= threshold or threshold < 3:
+        return X, Y
+    X, Y = numpy.asarray(X, dtype=float), numpy.asarray(Y, dtype=float)
+
+    m = threshold - 2
+    starts = numpy.unique(numpy.linspace(1, n-1, m+1).astype(numpy.intp)[:-1])
+    counts = numpy.diff(numpy.append(starts, n-1))
+    seg_id = numpy.repeat(numpy.arange(len(starts)), counts)
+    inner  = slice(1, n-1)
+
+    # Neighbor points: first point, bucket averages, last point
+    xavg = numpy.add.reduceat(X[inner], starts-1) / counts
+    yavg = numpy.add.reduceat(Y[inner], starts-1) / counts
+    ax = numpy.append(X[0], xavg)[seg_id]
+    ay = numpy.append(Y[0], yavg)[seg_id]
+    cx = numpy.append(xavg[1:], X[-1])[seg_id]
+    cy = numpy.append(yavg[1:], Y[-1])[seg_id]
+
+    area = numpy.abs((ax - cx) * (Y[inner] - ay) - (ax - X[inner]) * (cy - ay))
+    idx = _segment_arg(area, starts-1, seg_id, numpy.fmax) + 1
+    idx = numpy.concatenate(([0], idx, [n-1]))
+    return X[idx], Y[idx]
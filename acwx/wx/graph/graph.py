@@ -6,13 +6,17 @@
 # This program is free software: you can redistribute it and/or modify it
 # under the terms of the MIT (Expat) license.
 from __future__ import division, absolute_import, print_function, unicode_literals
-__all__ = 'RealtimeGraph'.split()
+__all__ = 'RealtimeGraph GraphGrid GraphPanel'.split()
 
 from acwx.util import cached_property
 from acwx.wx   import subwidget, widget, Widget
 from .series  import Series
+from .ingest  import IngestBuffer
+from .loader  import StreamLoader
+from .autoscale import QuantizedScale
 
 import wx, sys
+from timeit import default_timer
 import matplotlib
 matplotlib.use('WXAgg')
 from matplotlib.figure import Figure
@@ -26,43 +30,109 @@ EPS = 10 * sys.float_info.epsilon
 def coalesce(*arg):
     return next(x for x in arg if x is not None)
 
+def _save_figure(canvas, graphs, path, **kwargs):
+    """Save a figure, including the lines of graphs drawn in blit mode.
 
-class RealtimeGraph(Widget):
-    """Real-time graphing with support for dual-axis graphs and real-time limit updates.
-
-    After initialization, you must add lines to the graph before plotting
-    any points AND BEFORE SETTING TITLE!
-
-    Even thoug this widget is written for real-time plotting, nothing
-    prevents it from being useful as a static graph widget. Simply pass
-    your X and Y data into the C{add_series()} method and call C{redraw()}.
+    Older matplotlib versions leave animated (blitted) lines out of
+    C{print_figure()}; they are drawn normally while saving, and the blit
+    backgrounds are recaptured afterwards.
     """
+    blitting = [ graph for graph in graphs if graph.blit ]
+    for graph in blitting:
+        graph.blit = False
+        for line in graph.__dict__.get('lines', ()):
+            line.set_animated(False)
+    try:
+        canvas.print_figure(path, **kwargs)
+    finally:
+        for graph in blitting:
+            graph.blit = True
+            graph._background = None
+            for line in graph.__dict__.get('lines', ()):
+                line.set_animated(True)
+        if blitting:
+            canvas.draw()
+
+
+class _FrameScheduler(object):
+    """Redraw scheduling shared by the graph widgets.
+
+    Without max_fps every request redraws immediately. With max_fps,
+    requests only mark the widget dirty and a timer performs (at most) one
+    coalesced redraw per frame, draining producer buffers first.
+    """
+    def init_frames(self, max_fps):
+        self.max_fps     = max_fps
+        self.dirty       = False
+        self.frame_stats = dict(rendered=0, coalesced=0, dropped=0)
+        self.Bind(wx.EVT_WINDOW_DESTROY, self.on_destroy)
+        if max_fps:
+            self._frame_time = None
+            self._frame_interval = 1 / max_fps
+            self.frame_timer = wx.Timer(self)
+            self.Bind(wx.EVT_TIMER, self.on_frame_timer, self.frame_timer)
+            self.frame_timer.Start(max(1, int(1000 / max_fps)))
+
+    def request_redraw(self):
+        """Redraw now, or at the next frame tick when max_fps is set"""
+        if not self.max_fps:
+            self.redraw()
+        else:
+            self._mark_dirty()
 
-    def __init__(self, parent, bbox=None, bbox2=None, initial_bbox=None, initial_bbox2=None, pad=None, xpad=0, ypad=0, ypad2=0, **kwargs):
-        """
-        Bounding boxes have form: [ x0, y0, x1, y1 ]
-
-        Note: Both axes share an x-axis, so there is limited use in
-        specifying different x-ranges between the left and right axes.
+    def _mark_dirty(self):
+        """Schedule a redraw at the next frame tick"""
+        if self.dirty:
+            self.frame_stats['coalesced'] += 1
+        else:
+            self.dirty = True
+
+    def on_frame_timer(self, event):
+        now = default_timer()
+        if self._frame_time is not None:
+            # Frame slots missed because the GUI thread was busy
+            missed = int((now - self._frame_time) / self._frame_interval) - 1
+            if missed > 0:
+                self.frame_stats['dropped'] += missed
+        self._frame_time = now
+
+        if self.drain_producers():
+            self._mark_dirty()
+        if self.dirty:
+            self.dirty = False
+            self.redraw()
+            self.frame_stats['rendered'] += 1
+
+    def on_destroy(self, event):
+        if event.GetEventObject() is self and self.max_fps:
+            self.frame_timer.Stop()
+        event.Skip()
+
+
+class _GraphCore(object):
+    """Series, axes and line management for one plot area.
+
+    Requires C{fig}, C{canvas}, C{max_fps} and C{request_redraw()} from
+    the concrete class; C{subplot} gives the axes position in the figure.
+    """
+    subplot = (1, 1, 1)
 
-        @param bbox, bbox2: strict bounding box for primary / secondary axis, any values may be None
-        @param initial_bbox, initial_bbox2: Intial / minimal bounding boxes, any values may be None
-        @param xpad: padding to apply to x axis (data will not be closer than this to edge)
-        @param ypad, ypad2: padding to apply to y axis
-        @param pad: set ypad and ypad2 simultaneously
-        """
-        super(RealtimeGraph,self).__init__(parent, **kwargs)
+    def init_graph(self, bbox=None, bbox2=None, initial_bbox=None, initial_bbox2=None, pad=None, xpad=0, ypad=0, ypad2=0, blit=False, autoscale=None):
         self.plot_kwargs = dict(linewidth=1)
         self.title_size  = 12
         self.series      = []
         self.xpad        = xpad
-        self.ypad        = ypad  or pad
-        self.ypad2       = ypad2 or pad
+        self.ypad        = ypad  or pad or 0
+        self.ypad2       = ypad2 or pad or 0
         self.bbox        = bbox  or [None]*4
         self.bbox2       = bbox2 or [None]*4
         self.init_bbox   = initial_bbox  or [None]*4
         self.init_bbox2  = initial_bbox2 or [None]*4
-        self.sizer.Add(self.canvas, 1, wx.EXPAND)
+        self.blit        = blit
+        self._background = None
+        self._bounds     = None
+        self.autoscale   = autoscale
+        self.scales      = dict()
 
     def add_series(self, name=None, axis=0, color=(1,1,0), **kwargs):
         """Add a data series to the graph
@@ -73,54 +143,246 @@ class RealtimeGraph(Widget):
         @param format: matplotlib format token such as, 'go-'
         @param xmin, xmax, ymin, xmax: initial bounding box
         @param X, Y: lists containing plot data
+        @param capacity: maximum number of points to keep (uses preallocated ring buffers)
+        @param dtype: C{'float64'} or C{'float32'}, ring buffer dtype, or compact typed
+            array storage when no capacity is given
+        @param max_points, max_age: retention policies applied as points are added
+        @param decimate: C{'m4'} or C{'lttb'} to draw about 4 points per pixel
+        @param lod: LOD pyramid reduction factor (e.g., 4) for long histories
+        @param storage: storage engine, e.g., C{MemmapStorage(path)} to
+            record to (or display a recording from) disk
         """
-        self.series.append(Series(name,axis,color,**kwargs))
+        series = Series(name,axis,color,**kwargs)
+        self.series.append(series)
+        if 'lines' in self.__dict__:
+            self.lines.append(self.plot_series(series))
+            self.update_legend()
+            self._bounds = None
+        return series
+
+    def remove_series(self, series):
+        """Remove a data series (given by index, name, or Series object)
+
+        Only the series' own line artist is removed; other series and their
+        cached data are not touched.
+        """
+        if isinstance(series, Series):
+            i = self.series.index(series)
+        elif isinstance(series, int):
+            i = series
+        else:
+            i = next(i for i, s in enumerate(self.series) if s.name == series)
+        series = self.series.pop(i)
+        if 'lines' in self.__dict__:
+            self.lines.pop(i).remove()
+            self.update_legend()
+            self._bounds = None
+        return series
 
     def add_points(self, *points):
         for i, pt in enumerate(points):
             self.series[i].add_point(*pt)
-        self.redraw()
+        self.request_redraw()
+
+    def add_batch(self, batch, redraw=True):
+        """Add blocks of points to any number of series
+
+        @param batch: dict mapping series index to an C{(xs, ys)} pair of
+            sequences or numpy arrays
+        @param redraw: when true, redraw (once) after all series are updated
+        """
+        for i, (xs, ys) in batch.items():
+            self.series[i].extend(xs, ys)
+        if redraw:
+            self.request_redraw()
+
+    def producer(self, i, maxlen=None):
+        """Thread-safe ingestion buffer for series i
+
+        Worker threads may C{push()} / C{push_many()} points into the
+        returned L{IngestBuffer}. Pending points are drained in bulk on the
+        GUI thread at each frame tick (when max_fps is set) or else via a
+        single C{wx.CallAfter} whenever the buffer becomes non-empty.
+
+        All producers of a series share its buffer; a maxlen smaller than
+        the existing buffer's bound (or bounding an unbounded buffer)
+        applies to it from now on.
+        """
+        series = self.series[i]
+        if series.inbox is None:
+            wakeup = None if self.max_fps else (lambda: wx.CallAfter(self.on_ingest_wakeup))
+            series.inbox = IngestBuffer(maxlen, wakeup)
+        elif not isinstance(series.inbox, IngestBuffer):
+            raise ValueError("Series {} is fed by an attached source".format(i))
+        elif maxlen is not None and (series.inbox.maxlen is None or maxlen < series.inbox.maxlen):
+            series.inbox.maxlen = maxlen
+        return series.inbox
+
+    def attach_source(self, i, source):
+        """Feed series i from an external data source
+
+        The source may be any object providing C{len()} (points pending)
+        and C{drain()} (returning C{(X, Y)} arrays), for instance a
+        L{SharedRingReader} attached to another process' writer. Sources
+        have no wakeup mechanism and are only polled at frame ticks, so
+        the graph must be created with max_fps (ValueError otherwise).
+        """
+        if not self.max_fps:
+            raise ValueError("Attached sources are only polled at frame ticks, max_fps is required")
+        self.series[i].inbox = source
+
+    def stream_file(self, path, **kwargs):
+        """Load a (large) CSV or C{.npy} file in the background
+
+        The data are read in chunks on a worker thread and appear in the
+        graph as they arrive. Takes the L{StreamLoader} options; returns
+        the (started) loader, which may be cancelled.
+
+        Each loaded point is eventually stored by the target series. The
+        default L{ListStorage} costs at least 32 bytes per coordinate (a
+        python float plus a list slot), so a 10 million row file costs
+        some 650MB per series. For large files, create the target series
+        with C{dtype='float32'} or C{'float64'} (4 or 8 bytes per
+        coordinate) or with a L{MemmapStorage} backed by a file.
+        """
+        loader = StreamLoader(self, path, **kwargs)
+        loader.start()
+        return loader
+
+    def drain_producers(self):
+        """Move all pending producer data into the series. Returns True if any."""
+        drained = False
+        for series in self.series:
+            if series.inbox is not None and len(series.inbox):
+                series.extend(*series.inbox.drain())
+                drained = True
+        return drained
+
+    def on_ingest_wakeup(self):
+        if self.drain_producers():
+            self.request_redraw()
 
     def redraw(self):
-        axes  = [ False, False ]
-        boxes = [ list(self.init_bbox), list(self.init_bbox2) ]
+        bounds = self.update_data()
+        if bounds is None:
+            return
+        if self.needs_full_draw(bounds):
+            self.apply_bounds(bounds)
+            self.canvas.draw()
+        else:
+            self.blit_lines()
+
+    def update_data(self):
+        """Compute the axis bounds and set the line data.
+
+        Returns the bounds (or None when there are no series). Nothing is
+        drawn; see C{redraw()}.
+        """
+        bounds = self.compute_bounds()
+        if bounds is None:
+            return None
 
         # Update the line data (internally, just sets a dirty flag)
+        xmin, xmax = (bounds[0] or bounds[1])[:2]
+        pixels = int(self.axes.bbox.width)
         for i, series in enumerate(self.series):
+            self.lines[i].set_data(*series.display_data(pixels, xmin, xmax))
+
+        return bounds
+
+    def compute_bounds(self):
+        """Axis bounds C{[ (x0, x1, y0, y1) or None, ... ]} for the left and right axes
+
+        Returns None when there are no series.
+        """
+        axes  = [ False, False ]
+        boxes = [ list(self.init_bbox), list(self.init_bbox2) ]
+
+        for series in self.series:
             axes[series.axis] = True
             series.update_bbox(boxes[series.axis])
-            self.lines[i].set_xdata(series.X)
-            self.lines[i].set_ydata(series.Y)
+
+        # Axes whose series are all empty (without initial bounds) have no extents
+        for i, box in enumerate(boxes):
+            if None in box:
+                axes[i] = False
 
         # With 2 axes we have a shared x-axis, thus we have to make them agree.
         if axes[1] and axes[0]:
-            xmin = coalesce(self.bbox2[0], self.bbox[0], min(boxes[0][0], boxes[1][0])-self.xpad)
-            xmax = max(xmin+EPS, coalesce(self.bbox2[2], self.bbox[2], max(boxes[0][2], boxes[1][2])+self.xpad))
+            xlo, xhi = self.autoscaled('x', min(boxes[0][0], boxes[1][0])-self.xpad, max(boxes[0][2], boxes[1][2])+self.xpad)
+            xmin = coalesce(self.bbox2[0], self.bbox[0], xlo)
+            xmax = max(xmin+EPS, coalesce(self.bbox2[2], self.bbox[2], xhi))
         elif axes[0]:
-            xmin = coalesce(self.bbox[0], boxes[0][0]-self.xpad)
-            xmax = max(xmin+EPS, coalesce(self.bbox[2], boxes[0][2]+self.xpad))
+            xlo, xhi = self.autoscaled('x', boxes[0][0]-self.xpad, boxes[0][2]+self.xpad)
+            xmin = coalesce(self.bbox[0], xlo)
+            xmax = max(xmin+EPS, coalesce(self.bbox[2], xhi))
         elif axes[1]:
-            xmin = coalesce(self.bbox2[0], boxes[1][0]-self.xpad)
-            xmax = max(xmin+EPS, coalesce(self.bbox2[2], boxes[1][2]+self.xpad))
+            xlo, xhi = self.autoscaled('x', boxes[1][0]-self.xpad, boxes[1][2]+self.xpad)
+            xmin = coalesce(self.bbox2[0], xlo)
+            xmax = max(xmin+EPS, coalesce(self.bbox2[2], xhi))
         else:
             # No series!?
-            return
+            return None
 
         # Update windows
+        bounds = [ None, None ]
         if axes[0]:
-            ymin = coalesce(self.bbox[1], boxes[0][1]-self.ypad)
-            ymax = max(ymin+EPS, coalesce(self.bbox[3], boxes[0][3]+self.ypad))
-            self.axes.set_xbound(lower=xmin, upper=xmax)
-            self.axes.set_ybound(lower=ymin, upper=ymax)
+            ylo, yhi = self.autoscaled('y', boxes[0][1]-self.ypad, boxes[0][3]+self.ypad)
+            ymin = coalesce(self.bbox[1], ylo)
+            ymax = max(ymin+EPS, coalesce(self.bbox[3], yhi))
+            bounds[0] = (xmin, xmax, ymin, ymax)
 
         if axes[1]:
-            ymin = coalesce(self.bbox2[1], boxes[1][1]-self.ypad2)
-            ymax = max(ymin+EPS, coalesce(self.bbox2[3], boxes[1][3]+self.ypad2))
-            self.axes2.set_xbound(lower=xmin, upper=xmax)
-            self.axes2.set_ybound(lower=ymin, upper=ymax)
+            ylo, yhi = self.autoscaled('y2', boxes[1][1]-self.ypad2, boxes[1][3]+self.ypad2)
+            ymin = coalesce(self.bbox2[1], ylo)
+            ymax = max(ymin+EPS, coalesce(self.bbox2[3], yhi))
+            bounds[1] = (xmin, xmax, ymin, ymax)
+
+        return bounds
+
+    def needs_full_draw(self, bounds):
+        """False when only the lines need to be blitted over the cached background"""
+        return not (self.blit and self._background is not None and bounds == self._bounds)
+
+    def apply_bounds(self, bounds):
+        self._bounds = bounds
+        if bounds[0]:
+            self.axes.set_xbound(lower=bounds[0][0], upper=bounds[0][1])
+            self.axes.set_ybound(lower=bounds[0][2], upper=bounds[0][3])
+        if bounds[1]:
+            self.axes2.set_xbound(lower=bounds[1][0], upper=bounds[1][1])
+            self.axes2.set_ybound(lower=bounds[1][2], upper=bounds[1][3])
+
+    def blit_lines(self):
+        """Draw the lines over the cached background of this plot area"""
+        self.canvas.restore_region(self._background)
+        self.draw_lines()
+        self.canvas.blit(self.blit_bbox)
 
-        # Redraw
-        self.canvas.draw()
+    @property
+    def blit_bbox(self):
+        """Canvas region restored and blitted in blit mode"""
+        return self.axes.bbox
+
+    def capture_background(self):
+        """Cache the static background (after a full draw) and draw the lines over it"""
+        self._background = self.canvas.copy_from_bbox(self.blit_bbox)
+        self.draw_lines()
+
+    def autoscaled(self, axis, lo, hi):
+        """Automatic limits for data spanning [lo, hi] on the given axis"""
+        if not self.autoscale:
+            return lo, hi
+        if axis not in self.scales:
+            options = self.autoscale if isinstance(self.autoscale, dict) else dict()
+            self.scales[axis] = QuantizedScale(**options)
+        return self.scales[axis](lo, hi)
+
+    def draw_lines(self):
+        """Draw just the line artists (blit mode)"""
+        # Avoid building (and thus locking) the lines from a paint event
+        for line in self.__dict__.get('lines', ()):
+            line.axes.draw_artist(line)
 
     @property
     def title(self):
@@ -128,29 +390,16 @@ class RealtimeGraph(Widget):
     @title.setter
     def title(self, title):
         self.axes.set_title(title, size=self.title_size)
-
-    @subwidget
-    def canvas(self):
-        """Figure canvas
-
-        See: http://matplotlib.org/api/backend_bases_api.html#matplotlib.backend_bases.FigureCanvasBase
-
-        Save image using: .canvas.print_figure(path)
-        """
-        return FigCanvas(self, wx.ID_ANY, self.fig)
-
-    @subwidget
-    def fig(self):
-        return Figure()
+        self._bounds = None
 
     @cached_property
     def v_formatter(self):
         """Formatter that won't use the "+1.XeY" horribleness that occurs by default when labels get long"""
         return ScalarFormatter(False)
 
-    @cached_property
+    @cached_property(depends=('fig', 'v_formatter'))
     def axes(self):
-        ax = self.fig.add_subplot(111)
+        ax = self.fig.add_subplot(*self.subplot)
         pylab.setp(ax.get_xticklabels(), fontsize=8)
         pylab.setp(ax.get_yticklabels(), fontsize=8)
 
@@ -160,7 +409,7 @@ class RealtimeGraph(Widget):
         ax.yaxis.set_minor_formatter( self.v_formatter )
         return ax
 
-    @cached_property
+    @cached_property(depends=('axes', 'v_formatter'))
     def axes2(self):
         ax = self.axes.twinx()
 
@@ -170,36 +419,233 @@ class RealtimeGraph(Widget):
         ax.yaxis.set_minor_formatter( self.v_formatter )
         return ax
 
-    @cached_property
+    @cached_property(depends=('axes', 'axes2'))
     def lines(self):
-        # Ugh, I don't think I'm a fan of the matplotlib API... I suspect
-        # this could probably be done better using a lower level API, but
-        # all the tutorials only show the high-level and I don't find it
-        # intuitive.
-        indices = [ [], [] ]
-        args    = [ [], [] ]
-        colors  = [ [], [] ]
-        lines   = [None]*len(self.series)
-
-        # Lock the series (prevent any additions)
-        self.series = tuple(self.series)
-
-        for idx, series in enumerate(self.series):
-            indices[series.axis].append(idx)
-            args[series.axis].append(series.X)
-            args[series.axis].append(series.Y)
-            if series.format:
-                args[series.axis].append(series.format)
-            colors[series.axis].append(series.color)
-
-        if indices[0]:
-            self.axes.set_color_cycle(colors[0])
-            for idx, line in zip(indices[0], self.axes.plot(*args[0], **self.plot_kwargs)):
-                lines[idx] = line
-
-        if indices[1]:
-            self.axes2.set_color_cycle(colors[1])
-            for idx, line in zip(indices[1], self.axes2.plot(*args[1], **self.plot_kwargs)):
-                lines[idx] = line
-
-        return tuple(lines)
+        """Line artists, one per series (in series order)"""
+        return [ self.plot_series(series) for series in self.series ]
+
+    def plot_series(self, series):
+        """Create the line artist for a series"""
+        args = [ series.X, series.Y ]
+        if series.format:
+            args.append(series.format)
+        kwargs = dict(self.plot_kwargs, label=series.name)
+        if not (series.format and any(c in 'bgrcmykwC' for c in series.format)):
+            kwargs.setdefault('color', series.color)
+        ax = self.axes2 if series.axis else self.axes
+        line, = ax.plot(*args, **kwargs)
+        line.set_animated(self.blit)
+        return line
+
+    def update_legend(self):
+        """Rebuild any legends to match the current series"""
+        for name in ('axes', 'axes2'):
+            ax = self.__dict__.get(name)
+            if ax is not None and ax.get_legend() is not None:
+                ax.legend()
+
+
+class RealtimeGraph(_GraphCore, _FrameScheduler, Widget):
+    """Real-time graphing with support for dual-axis graphs and real-time limit updates.
+
+    After initialization, add series to the graph before plotting any
+    points. Series may also be added or removed later (see
+    C{add_series()} and C{remove_series()}); series indices shift down
+    when an earlier series is removed.
+
+    Even thoug this widget is written for real-time plotting, nothing
+    prevents it from being useful as a static graph widget. Simply pass
+    your X and Y data into the C{add_series()} method and call C{redraw()}.
+    Recordings made with a L{MemmapStorage} can be displayed the same way
+    by passing C{storage=MemmapStorage(path, readonly=True)}.
+    """
+
+    def __init__(self, parent, bbox=None, bbox2=None, initial_bbox=None, initial_bbox2=None, pad=None, xpad=0, ypad=0, ypad2=0, blit=False, max_fps=None, autoscale=None, **kwargs):
+        """
+        Bounding boxes have form: [ x0, y0, x1, y1 ]
+
+        Note: Both axes share an x-axis, so there is limited use in
+        specifying different x-ranges between the left and right axes.
+
+        @param bbox, bbox2: strict bounding box for primary / secondary axis, any values may be None
+        @param initial_bbox, initial_bbox2: Intial / minimal bounding boxes, any values may be None
+        @param xpad: padding to apply to x axis (data will not be closer than this to edge)
+        @param ypad, ypad2: padding to apply to y axis
+        @param pad: set ypad and ypad2 simultaneously
+        @param blit: when true, redraw only the lines over a cached
+            background unless the axis bounds change or the widget is resized
+        @param max_fps: when given, data updates only mark the graph dirty
+            and a timer performs (at most) one coalesced redraw per frame
+        @param autoscale: C{True} or a dict of L{QuantizedScale} options to
+            grow the automatic axis limits in nice steps and shrink them only
+            after a delay, rather than tracking the exact data extents
+        """
+        super(RealtimeGraph,self).__init__(parent, **kwargs)
+        self.init_graph(bbox, bbox2, initial_bbox, initial_bbox2, pad, xpad, ypad, ypad2, blit, autoscale)
+        self.sizer.Add(self.canvas, 1, wx.EXPAND)
+        self.canvas.mpl_connect('draw_event', self.on_draw_event)
+        self.canvas.Bind(wx.EVT_SIZE, self.on_canvas_size)
+        self.init_frames(max_fps)
+
+    def on_draw_event(self, event):
+        """Cache the static background after every full draw (blit mode).
+
+        Lines are animated in blit mode, so they are excluded from the full
+        draw and must be drawn over the freshly cached background.
+        """
+        if not self.blit:
+            return
+        self.capture_background()
+        self.canvas.blit(self.fig.bbox)
+
+    def on_canvas_size(self, event):
+        self._background = None
+        event.Skip()
+
+    def save_figure(self, path, **kwargs):
+        """Save the graph image (keyword arguments as for C{print_figure()})"""
+        _save_figure(self.canvas, [self], path, **kwargs)
+
+    @subwidget
+    def canvas(self):
+        """Figure canvas
+
+        See: http://matplotlib.org/api/backend_bases_api.html#matplotlib.backend_bases.FigureCanvasBase
+
+        Save image using: .save_figure(path); in blit mode, older
+        matplotlib versions leave the (animated) lines out of
+        .canvas.print_figure(path).
+        """
+        return FigCanvas(self, wx.ID_ANY, self.fig)
+
+    @subwidget
+    def fig(self):
+        return Figure()
+
+
+class GraphPanel(_GraphCore):
+    """One subplot of a L{GraphGrid}.
+
+    Provides the C{RealtimeGraph} series API (C{add_series()},
+    C{add_points()}, C{add_batch()}, C{producer()}, ...) and the same
+    axis options. Data updates mark just this panel dirty; the grid
+    redraws the dirty panels together.
+    """
+    def __init__(self, grid, subplot, **kwargs):
+        self.grid    = grid
+        self.subplot = subplot
+        self.init_graph(**kwargs)
+
+    @property
+    def fig(self):
+        return self.grid.fig
+
+    @property
+    def canvas(self):
+        return self.grid.canvas
+
+    @property
+    def max_fps(self):
+        return self.grid.max_fps
+
+    def request_redraw(self):
+        self.grid.request_redraw(self)
+
+    def redraw(self):
+        self.grid.dirty_panels.add(self)
+        self.grid.redraw()
+
+
+class GraphGrid(_FrameScheduler, Widget):
+    """Several graph panels as subplots of a single figure and canvas.
+
+    Panels are created by C{add_panel()} and filled in row-major order.
+    One canvas (and one paint pass) serves all panels: a redraw updates
+    only the dirty panels and, when no axis bounds changed, blits just
+    those panels' axes areas (panels created with blit=True). Any bounds
+    change falls back to a single full draw of the figure.
+    """
+    def __init__(self, parent, rows=1, cols=1, max_fps=None, **kwargs):
+        """
+        @param rows, cols: subplot grid shape
+        @param max_fps: as for C{RealtimeGraph}, coalesce redraws of all
+            panels into (at most) one paint pass per frame
+        """
+        super(GraphGrid,self).__init__(parent, **kwargs)
+        self.rows   = rows
+        self.cols   = cols
+        self.panels = []
+        self.dirty_panels = set()
+        self.sizer.Add(self.canvas, 1, wx.EXPAND)
+        self.canvas.mpl_connect('draw_event', self.on_draw_event)
+        self.canvas.Bind(wx.EVT_SIZE, self.on_canvas_size)
+        self.init_frames(max_fps)
+
+    def add_panel(self, **kwargs):
+        """Add the next panel; takes the C{RealtimeGraph} axis options (bbox, pad, blit, ...)"""
+        n = len(self.panels)
+        if n >= self.rows * self.cols:
+            raise ValueError("Graph grid is full ({}x{})".format(self.rows, self.cols))
+        panel = GraphPanel(self, (self.rows, self.cols, n + 1), **kwargs)
+        self.panels.append(panel)
+        return panel
+
+    def request_redraw(self, panel=None):
+        """Redraw the given panel (default: all) now or at the next frame tick"""
+        self.dirty_panels.update([panel] if panel is not None else self.panels)
+        super(GraphGrid,self).request_redraw()
+
+    def drain_producers(self):
+        drained = False
+        for panel in self.panels:
+            if panel.drain_producers():
+                self.dirty_panels.add(panel)
+                drained = True
+        return drained
+
+    def redraw(self):
+        dirty, self.dirty_panels = self.dirty_panels, set()
+        full, blits = False, []
+        for panel in self.panels:
+            if panel not in dirty:
+                continue
+            bounds = panel.update_data()
+            if bounds is None:
+                continue
+            if panel.needs_full_draw(bounds):
+                panel.apply_bounds(bounds)
+                full = True
+            else:
+                blits.append(panel)
+
+        if full:
+            self.canvas.draw()
+        else:
+            for panel in blits:
+                panel.blit_lines()
+
+    def on_draw_event(self, event):
+        """Cache each blitting panel's background after a full draw"""
+        blitting = [ panel for panel in self.panels if panel.blit ]
+        for panel in blitting:
+            panel.capture_background()
+        if blitting:
+            self.canvas.blit(self.fig.bbox)
+
+    def on_canvas_size(self, event):
+        for panel in self.panels:
+            panel._background = None
+        event.Skip()
+
+    def save_figure(self, path, **kwargs):
+        """Save the image of all panels (keyword arguments as for C{print_figure()})"""
+        _save_figure(self.canvas, self.panels, path, **kwargs)
+
+    @subwidget
+    def canvas(self):
+        """Figure canvas shared by all panels"""
+        return FigCanvas(self, wx.ID_ANY, self.fig)
+
+    @subwidget
+    def fig(self):
+        return Figure()
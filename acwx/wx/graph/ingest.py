@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Thread-safe ingestion buffers for feeding graphs from worker threads"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+__all__ = 'IngestBuffer'.split()
+
+import threading
+import numpy
+
+
+class IngestBuffer(object):
+    """Double-buffered point queue between producer threads and the GUI.
+
+    Producers C{push()} single points or C{push_many()} blocks from any
+    thread; the lock is only held long enough to append. The GUI thread
+    C{drain()}s everything at once by swapping in an empty buffer, so
+    neither side ever waits on the other's processing.
+
+    When C{maxlen} points are pending, further points are rejected (push
+    returns False) and counted as dropped. C{stats} holds counts of
+    pushed, drained and dropped points and the pending high-water mark.
+
+    @param wakeup: optional callable, called (in the producer thread)
+        whenever a point is pushed into an empty buffer
+    """
+    def __init__(self, maxlen=None, wakeup=None):
+        self.maxlen = maxlen
+        self.wakeup = wakeup
+        self.stats  = dict(pushed=0, drained=0, dropped=0, high_water=0)
+        self._lock  = threading.Lock()
+        self._chunks = []
+        self._xs = self._ys = None
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def backpressure(self):
+        """Fraction of maxlen currently pending (0 when unbounded)"""
+        return self._n / self.maxlen if self.maxlen else 0
+
+    def push(self, x, y):
+        """Queue one point. Returns False if the buffer is full."""
+        with self._lock:
+            n = self._n
+            if self.maxlen is not None and n >= self.maxlen:
+                self.stats['dropped'] += 1
+                return False
+            if self._xs is None:
+                self._xs, self._ys = [], []
+                self._chunks.append((self._xs, self._ys))
+            self._xs.append(x)
+            self._ys.append(y)
+            self._n = n + 1
+            self.stats['pushed'] += 1
+            if n >= self.stats['high_water']:
+                self.stats['high_water'] = n + 1
+        if not n and self.wakeup is not None:
+            self.wakeup()
+        return True
+
+    def push_many(self, xs, ys):
+        """Queue a block of points. Returns the number of points accepted.
+
+        The block is copied, so the caller may refill its buffers at once.
+        """
+        xs, ys = numpy.array(xs, dtype=float), numpy.array(ys, dtype=float)
+        k = len(xs)
+        with self._lock:
+            n = self._n
+            if self.maxlen is not None and n + k > self.maxlen:
+                accept = max(0, self.maxlen - n)
+                self.stats['dropped'] += k - accept
+                xs, ys, k = xs[:accept], ys[:accept], accept
+            if k:
+                self._xs = self._ys = None
+                self._chunks.append((xs, ys))
+                self._n = n + k
+                self.stats['pushed'] += k
+                self.stats['high_water'] = max(self.stats['high_water'], n + k)
+        if k and not n and self.wakeup is not None:
+            self.wakeup()
+        return k
+
+    def drain(self):
+        """Take all pending points. Returns C{(X, Y)} numpy arrays."""
+        with self._lock:
+            chunks, self._chunks = self._chunks, []
+            self._xs = self._ys = None
+            self.stats['drained'] += self._n
+            self._n = 0
+        if not chunks:
+            return numpy.empty(0), numpy.empty(0)
+        return (numpy.concatenate([ numpy.asarray(c[0], dtype=float) for c in chunks ]),
+                numpy.concatenate([ numpy.asarray(c[1], dtype=float) for c in chunks ]))
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Chunked background loading of large data files into graphs"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+__all__ = 'StreamLoader csv_chunks npy_chunks'.split()
+
+import os, threading, time
+import numpy
+
+
+def csv_chunks(path, chunk=65536, delimiter=',', skiprows=0, progress=None):
+    """Yields 2-d float arrays of (about) chunk rows of a delimited text file
+
+    @param progress: optional callable, passed the fraction of the file read
+    """
+    size = max(1, os.path.getsize(path))
+    done = 0
+    with open(path, 'r') as fh:
+        for _ in range(skiprows):
+            done += len(fh.readline())
+        while True:
+            lines = fh.readlines(chunk * 32)# size hint in characters
+            if not lines:
+                break
+            rows = numpy.loadtxt(lines, delimiter=delimiter, ndmin=2)
+            if progress is not None:
+                done += sum(len(line) for line in lines)
+                progress(min(1.0, done / size))
+            if len(rows):
+                yield rows
+
+
+def npy_chunks(path, chunk=65536, progress=None):
+    """Yields 2-d float arrays of chunk rows of a 2-d C{.npy} file
+
+    The file is memory-mapped, so only the current chunk is resident.
+    """
+    data = numpy.load(path, mmap_mode='r')
+    if data.ndim != 2:
+        raise ValueError("Expected a 2-d array in {}".format(path))
+    n = len(data)
+    for i in range(0, n, chunk):
+        rows = numpy.array(data[i:i+chunk], dtype=float)
+        if progress is not None:
+            progress(min(n, i+chunk) / max(1, n))
+        yield rows
+
+
+class StreamLoader(threading.Thread):
+    """Streams a CSV or C{.npy} file into graph series from a worker thread.
+
+    Column C{xcol} provides the x-values and each of C{ycols} feeds the
+    series of the same position in C{series}. Chunks are pushed into the
+    graph's producer buffers (see C{RealtimeGraph.producer}) and the GUI
+    thread drains them as it redraws, so the graph shows a growing preview
+    and stays responsive. Target series without decimation or a LOD
+    pyramid are switched to M4 decimation to keep those redraws cheap. The
+    loader waits whenever a buffer is over half full, which bounds the
+    memory held in transit to about C{maxlen} points per series.
+
+    After completion (or failure, see C{error}), C{done(loader)} is called
+    on the GUI thread via C{call_after} (default C{wx.CallAfter}, so wx is
+    only imported when a done callback is given).
+    """
+    def __init__(self, graph, path, series=(0,), xcol=0, ycols=None, format=None,
+                 chunk=65536, maxlen=None, delimiter=',', skiprows=0, done=None, call_after=None):
+        super(StreamLoader,self).__init__()
+        self.daemon = True
+        self.path = path
+        self.format = format or ('npy' if path.endswith('.npy') else 'csv')
+        self.series = tuple(series)
+        self.xcol = xcol
+        self.ycols = tuple(ycols) if ycols is not None else tuple(range(1, len(self.series)+1))
+        self.chunk = chunk
+        self.delimiter = delimiter
+        self.skiprows = skiprows
+        self.done = done
+        self.call_after = call_after
+        self.progress = 0.0
+        self.points = 0
+        self.error = None
+        self._cancel = threading.Event()
+        maxlen = maxlen or 4*chunk
+        for i in self.series:
+            series = graph.series[i]
+            if series.decimate is None and series.lod is None:
+                series.decimate = 'm4'
+        self.buffers = [ graph.producer(i, maxlen) for i in self.series ]
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def set_progress(self, fraction):
+        self.progress = fraction
+
+    def chunks(self):
+        if self.format == 'npy':
+            return npy_chunks(self.path, self.chunk, progress=self.set_progress)
+        return csv_chunks(self.path, self.chunk, self.delimiter, self.skiprows, progress=self.set_progress)
+
+    def run(self):
+        try:
+            for rows in self.chunks():
+                X = rows[:, self.xcol]
+                for buf, col in zip(self.buffers, self.ycols):
+                    self.push(buf, X, rows[:, col])
+                self.points += len(rows)
+                if self.cancelled:
+                    break
+        except Exception as err:
+            self.error = err
+        if self.done is not None:
+            call_after = self.call_after
+            if call_after is None:
+                import wx
+                call_after = wx.CallAfter
+            call_after(self.done, self)
+
+    def push(self, buf, xs, ys):
+        while len(xs) and not self.cancelled:
+            if buf.backpressure > 0.5:
+                time.sleep(0.005)
+                continue
+            k = buf.push_many(xs, ys)
+            xs, ys = xs[k:], ys[k:]
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Multi-resolution level-of-detail pyramid for long data series"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+__all__ = 'LODPyramid'.split()
+
+import numpy
+
+# Aggregate row fields
+X0, X1, XLO, LO, XHI, HI = range(6)
+
+
+class _Level(object):
+    """Growable column store of aggregate rows (one contiguous array per field)"""
+    def __init__(self):
+        self.cols  = numpy.empty((6, 16))
+        self.start = 0
+        self.end   = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def col(self, j, a=0, b=None):
+        b = len(self) if b is None else b
+        return self.cols[j, self.start+a:self.start+b]
+
+    def append(self, rows):
+        k = len(rows)
+        if self.end + k > self.cols.shape[1]:
+            n = len(self)
+            cols = numpy.empty((6, max(16, 2*(n+k))))
+            cols[:, :n] = self.cols[:, self.start:self.end]
+            self.cols, self.start, self.end = cols, 0, n
+        self.cols[:, self.end:self.end+k] = rows.T
+        self.end += k
+
+    def drop_before(self, x):
+        """Drop rows which start before x"""
+        self.start += int(self.col(X0).searchsorted(x, 'left'))
+
+
+class LODPyramid(object):
+    """Pyramid of min/max aggregates over monotonic-x data.
+
+    Level k summarizes C{factor**(k+1)} consecutive points by the first and
+    last x-values of the block and the position and value of its y-minimum
+    and y-maximum. Levels are updated incrementally as points are appended;
+    incomplete blocks wait in per-level pending buffers.
+    """
+    def __init__(self, factor=4):
+        self.factor = int(factor)
+        if self.factor < 2:
+            raise ValueError("LOD reduction factor must be at least 2")
+        self.clear()
+
+    def clear(self):
+        self.levels  = []
+        self.pending = []
+        self._raw    = []
+
+    def append(self, x, y):
+        self._raw.append((x, x, x, y, x, y))
+        if len(self._raw) == self.factor:
+            rows, self._raw = numpy.array(self._raw, dtype=float), []
+            self._feed(0, rows)
+
+    def extend(self, xs, ys):
+        xs, ys = numpy.asarray(xs, dtype=float), numpy.asarray(ys, dtype=float)
+        rows = numpy.column_stack((xs, xs, xs, ys, xs, ys))
+        if self._raw:
+            rows = numpy.concatenate((numpy.array(self._raw, dtype=float), rows))
+        m = len(rows) - len(rows) % self.factor
+        self._raw = [ tuple(r) for r in rows[m:].tolist() ]
+        if m:
+            self._feed(0, rows[:m])
+
+    def drop_before(self, x):
+        """Forget aggregates of any data before x.
+
+        Aggregates which straddle x are dropped as well (they may hold an
+        extreme which is no longer in the series); L{select} fills the gap
+        from the finer levels.
+        """
+        for k, level in enumerate(self.levels):
+            level.drop_before(x)
+            self.pending[k] = self.pending[k][self.pending[k][:,X0] >= x]
+        self._raw = [ r for r in self._raw if r[X0] >= x ]
+
+    def _feed(self, k, rows):
+        """Group rows (aggregates of level k-1, or raw points) into level k"""
+        f = self.factor
+        if len(self.levels) <= k:
+            self.levels.append(_Level())
+            self.pending.append(rows[:0])
+        if len(self.pending[k]):
+            rows = numpy.concatenate((self.pending[k], rows))
+        m = len(rows) // f
+        self.pending[k] = rows[m*f:]
+        if not m:
+            return
+
+        g = rows[:m*f].reshape(m, f, 6)
+        idx = numpy.arange(m)
+        lo = numpy.where(numpy.isnan(g[:,:,LO]), numpy.inf, g[:,:,LO]).argmin(axis=1)
+        hi = numpy.where(numpy.isnan(g[:,:,HI]), -numpy.inf, g[:,:,HI]).argmax(axis=1)
+        agg = numpy.column_stack((
+            g[:,0,X0], g[:,-1,X1],
+            g[idx,lo,XLO], g[idx,lo,LO],
+            g[idx,hi,XHI], g[idx,hi,HI],
+        ))
+        self.levels[k].append(agg)
+        self._feed(k+1, agg)
+
+    def select(self, x0, x1, pixels):
+        """Returns C{(X, Y)} drawing the data in [x0, x1] at screen resolution.
+
+        Uses the coarsest level with at least two aggregates per pixel in
+        the range; the data before the start and after the end of that level
+        are filled in from finer levels and the pending raw points. Returns C{None} when even
+        the finest level is too coarse (the raw data should be drawn).
+        """
+        for k in range(len(self.levels)-1, -1, -1):
+            level = self.levels[k]
+            a = int(level.col(X1).searchsorted(x0, 'left'))
+            b = int(level.col(X0).searchsorted(x1, 'right'))
+            if b - a >= 2*pixels:
+                break
+        else:
+            return None
+
+        parts = [ level.cols[:, level.start+a:level.start+b] ]
+        if a == 0:
+            # Stitch in the older data whose coarse aggregates were dropped
+            first = level.col(X0, 0, 1)[0] if b else numpy.inf
+            for j in range(k-1, -1, -1):
+                finer = self.levels[j]
+                i, m = finer.col(X1).searchsorted((x0, first), 'left')
+                if m > i:
+                    parts.insert(0, finer.cols[:, finer.start+i:finer.start+m])
+                    first = finer.col(X0, i, i+1)[0]
+        if b == len(level):
+            # Stitch in the newer data which are not yet aggregated at level k
+            last = level.col(X1, b-1, b)[0] if b else -numpy.inf
+            for j in range(k, -1, -1):
+                tail = self.pending[j]
+                tail = tail[tail[:,X0] > last]
+                if len(tail):
+                    parts.append(tail.T)
+                    last = tail[-1, X1]
+            raw = numpy.array(self._raw, dtype=float).reshape(-1, 6)
+            raw = raw[raw[:,X0] > last]
+            if len(raw):
+                parts.append(raw.T)
+
+        cols = numpy.concatenate(parts, axis=1)
+        lo_first = cols[XLO] <= cols[XHI]
+        X = numpy.empty(2*cols.shape[1])
+        Y = numpy.empty(2*cols.shape[1])
+        X[0::2] = numpy.where(lo_first, cols[XLO], cols[XHI])
+        Y[0::2] = numpy.where(lo_first, cols[LO],  cols[HI])
+        X[1::2] = numpy.where(lo_first, cols[XHI], cols[XLO])
+        Y[1::2] = numpy.where(lo_first, cols[HI],  cols[LO])
+        return X, Y
@@ -8,14 +8,136 @@
 from __future__ import division, absolute_import, print_function, unicode_literals
 __all__ = 'Series'.split()
 
+from .storage import ListStorage, ArrayStorage, RingStorage
+from .decimate import m4, lttb
+from .lod import LODPyramid
+
+from collections import deque
+import numpy
+
+
+def _is_sorted(X):
+    """True if the numpy array X is non-decreasing (and thus has no NaN)"""
+    return bool((X[1:] >= X[:-1]).all()) and not (len(X) and X[0] != X[0])
+
+
+class _SlidingExtrema(object):
+    """Minimum and maximum of a sliding window of values.
+
+    Values are pushed with increasing (global) indices and evicted from the
+    front by index. Both operations are amortized O(1) using monotonic
+    deques of C{(index, value)} pairs. NaN values are ignored.
+    """
+    __slots__ = 'lo hi'.split()
+
+    def __init__(self):
+        self.lo = deque()
+        self.hi = deque()
+
+    def __nonzero__(self):
+        return bool(self.lo)
+    __bool__ = __nonzero__
+
+    @property
+    def min(self):
+        return self.lo[0][1]
+
+    @property
+    def max(self):
+        return self.hi[0][1]
+
+    def clear(self):
+        self.lo.clear()
+        self.hi.clear()
+
+    def push(self, i, v):
+        if v != v:
+            return
+        lo, hi = self.lo, self.hi
+        while lo and lo[-1][1] >= v:
+            lo.pop()
+        lo.append((i, v))
+        while hi and hi[-1][1] <= v:
+            hi.pop()
+        hi.append((i, v))
+
+    def push_many(self, i, vals):
+        """Push a block of values (numpy array) with indices starting at i.
+
+        Only the values which survive within the block (those below / above
+        every later value of the block) reach the deques. These are found
+        with a vectorized reverse accumulate.
+        """
+        idx = numpy.arange(i, i+len(vals))
+        keep = ~numpy.isnan(vals)
+        if not keep.all():
+            idx, vals = idx[keep], vals[keep]
+        if not len(vals):
+            return
+        for dq, accum, dominated, sign in ((self.lo, numpy.minimum, numpy.less, 1), (self.hi, numpy.maximum, numpy.greater, -1)):
+            suffix = accum.accumulate(vals[::-1])[::-1]
+            survive = numpy.append(dominated(vals[:-1], suffix[1:]), True)
+            best = sign * float(suffix[0])
+            while dq and sign * dq[-1][1] >= best:
+                dq.pop()
+            dq.extend(zip(idx[survive].tolist(), vals[survive].tolist()))
+
+    def evict(self, first):
+        """Forget all values with index less than first"""
+        lo, hi = self.lo, self.hi
+        while lo and lo[0][0] < first:
+            lo.popleft()
+        while hi and hi[0][0] < first:
+            hi.popleft()
+
 
 class Series(object):
+    """A named data series and its incrementally maintained extents.
+
+    Series use C{__slots__}, so there is no per-instance C{__dict__}; pass
+    a dtype to store the points compactly (see C{__init__}).
+    """
+    __slots__ = """
+        name axis color format min_width min_height max_points max_age
+        decimate lod inbox data empty xmin xmax ymin ymax _xmin _xmax _ymin _ymax
+        _display _display_key _stale _xext _yext _count
+    """.split()
+
+    DECIMATORS = {
+        None:   None,
+        'm4':   lambda X, Y, pixels: m4(X, Y, pixels),
+        'lttb': lambda X, Y, pixels: lttb(X, Y, 4*pixels),
+    }
+
     def __init__(
             self, name, axis=0, color='b',
             xmin=None, xmax=None, ymin=None, ymax=None,
             format=None, min_width=1, min_height=1,
-            X=None, Y=None
+            X=None, Y=None, capacity=None, dtype=None,
+            max_points=None, max_age=None, decimate=None, lod=None,
+            storage=None
         ):
+        """
+        @param capacity: when given, store at most this many points in
+            preallocated numpy ring buffers (oldest points are dropped
+            automatically). Otherwise, data are kept in python lists (or
+            typed arrays when a dtype is given).
+        @param dtype: C{'float64'} or C{'float32'} (e.g., for sensor data
+            which need no double precision). Selects the ring buffer dtype
+            (default float64) or, without capacity, compact L{ArrayStorage}
+            instead of lists of python floats.
+        @param storage: storage engine instance, for instance a
+            L{MemmapStorage} recording (overrides X, Y, capacity and dtype)
+        @param max_points: retention policy, keep at most this many points
+        @param max_age: retention policy, keep only points whose x-value is
+            within this distance of the most recent x-value (x-values are
+            assumed to be monotonic)
+        @param decimate: C{None}, C{'m4'} or C{'lttb'}, reduce the data handed
+            to matplotlib to about 4 points per horizontal pixel
+        @param lod: when given, maintain a min/max level-of-detail pyramid
+            with this reduction factor per level (e.g., 4) so that drawing
+            long histories costs the same as drawing short ones
+        """
         super(Series,self).__init__()
         self.min_width  = min_width
         self.min_height = min_height
@@ -23,34 +145,107 @@ class Series(object):
         self.color = color
         self.name = name
         self.axis = axis
+        self.max_points = max_points
+        self.max_age = max_age
+        if decimate not in self.DECIMATORS:
+            raise ValueError("Unknown decimation method {!r}".format(decimate))
+        self.decimate = decimate
+        self._display_key = None
+        self._display = None
+        self.lod = None if lod is None else LODPyramid(lod)
+        self.inbox = None
         self.xmin = self._xmin = xmin
         self.xmax = self._xmax = xmax
         self.ymin = self._ymin = ymin
         self.ymax = self._ymax = ymax
-        self.X = [] if X is None else X
-        self.Y = [] if Y is None else Y
+        if storage is not None:
+            self.data = storage
+        elif capacity is not None:
+            self.data = RingStorage(capacity, dtype or 'float64', X, Y)
+        elif dtype is not None:
+            self.data = ArrayStorage(dtype, X, Y)
+        else:
+            self.data = ListStorage(X, Y)
         self.empty = True
+        self._stale = False
+        self._xext = None # None while X is sorted, see _track_x()
+        self._yext = _SlidingExtrema()
+        self._count = 0
+        self._reset_extrema()
 
     def __len__(self):
-        return len(self.X)
+        return len(self.data)
+
+    @property
+    def X(self):
+        return self.data.X
+
+    @property
+    def Y(self):
+        return self.data.Y
+
+    def display_data(self, pixels, x0=None, x1=None):
+        """Returns the C{(X, Y)} data to draw into the given pixel width.
+
+        When the visible x-range is given and the series keeps a LOD
+        pyramid, the coarsest pyramid level which resolves the range is
+        drawn. Otherwise, this is the series data (decimated when
+        requested). Results are cached and only recomputed when the data,
+        range, or pixel width change.
+        """
+        if not pixels or (self.decimate is None and (self.lod is None or x0 is None)):
+            return self.X, self.Y
+        key = (self._count, len(self), pixels, x0, x1)
+        if key != self._display_key:
+            data = None
+            if self.lod is not None and x0 is not None:
+                data = self.lod.select(x0, x1, pixels)
+            if data is None:
+                X, Y = self.X, self.Y
+                if x0 is not None:
+                    a = max(0, self.data.search(x0, 'left') - 1)
+                    b = self.data.search(x1, 'right') + 1
+                    X, Y = X[a:b], Y[a:b]
+                data = (X, Y) if self.decimate is None else self.DECIMATORS[self.decimate](X, Y, pixels)
+            self._display = data
+            self._display_key = key
+        return self._display
 
     def update_bbox(self, box):
         """Updates the passed bounding box with the series' x/y min/max values.
 
         @param bbox: list or tuple of form: C{[ x0, y0, x1, y1 ]}
+
+        An empty series only contributes the configured initial bounds
+        (those which are not None).
         """
-        if box[0] is None or self.xmin < box[0]: box[0] = self.xmin
-        if box[1] is None or self.ymin < box[1]: box[1] = self.ymin
-        if box[2] is None or self.xmax > box[2]: box[2] = self.xmax
-        if box[3] is None or self.ymax > box[3]: box[3] = self.ymax
+        if self._stale:
+            self.recompute_bbox()
+        if self.xmin is not None and (box[0] is None or self.xmin < box[0]): box[0] = self.xmin
+        if self.ymin is not None and (box[1] is None or self.ymin < box[1]): box[1] = self.ymin
+        if self.xmax is not None and (box[2] is None or self.xmax > box[2]): box[2] = self.xmax
+        if self.ymax is not None and (box[3] is None or self.ymax > box[3]): box[3] = self.ymax
 
     def add_point(self, x, y):
         """Add a point and update the bounding box"""
         if self.empty:
             self.initial_point(x,y)
 
-        self.X.append(x)
-        self.Y.append(y)
+        n = len(self.data)
+        if self._xext is None and (x != x or (n and x < self.data.x_at(n-1))):
+            self._track_x()
+        self.data.append(x, y)
+        if self._xext is not None:
+            self._xext.push(self._count, x)
+        self._yext.push(self._count, y)
+        self._count += 1
+        if self.lod is not None:
+            self.lod.append(x, y)
+        if len(self.data) == n:# storage dropped a point (full ring)
+            self._evict()
+        elif len(self.data) > n + 1:# storage window grew (trimmed recording)
+            self._reset_extrema()
+            self.recompute_bbox()
 
         if x < self.xmin:
             self.xmin = x
@@ -62,30 +257,116 @@ class Series(object):
         elif self.ymax < y:
             self.ymax = y
 
+        if self.max_points is not None or self.max_age is not None:
+            self.apply_retention()
+
+    def extend(self, xs, ys):
+        """Add a block of points (sequences or numpy arrays)
+
+        The block is copied into storage at once and the extents are
+        updated with one vectorized pass per block.
+        """
+        xs, ys = numpy.asarray(xs), numpy.asarray(ys)
+        if xs.shape != ys.shape:
+            raise ValueError("X and Y blocks must have the same shape")
+        k = len(xs)
+        if not k:
+            return
+
+        n = len(self.data)
+        if self._xext is None and not (_is_sorted(xs) and (not n or xs[0] >= self.data.x_at(n-1))):
+            self._track_x()
+        self.data.extend(xs, ys)
+        if self._xext is not None:
+            self._xext.push_many(self._count, xs.astype(float))
+        self._yext.push_many(self._count, ys.astype(float))
+        self._count += k
+        if self.lod is not None:
+            self.lod.extend(xs, ys)
+        if len(self.data) < n + k:# storage dropped points (full ring)
+            self._evict()
+        elif len(self.data) > n + k:# storage window grew (trimmed recording)
+            self._reset_extrema()
+            self.recompute_bbox()
+        self._stale = True
+
+        if self.max_points is not None or self.max_age is not None:
+            self.apply_retention()
+
+    def apply_retention(self):
+        """Drop points excluded by the max_points / max_age policies.
+
+        Called automatically by C{add_point()} and C{extend()}. Costs
+        O(log n) when points must be dropped and O(1) otherwise.
+        """
+        n = len(self)
+        drop = 0
+        if self.max_points is not None and n > self.max_points:
+            drop = n - self.max_points
+        if self.max_age is not None and n > drop:
+            x1 = self.data.x_at(n-1) - self.max_age
+            if self.data.x_at(drop) < x1:
+                drop = self.data.search(x1, 'left')
+        if drop:
+            self.data.drop(drop)
+            self._evict()
+
     def trim_to_domain(self, x1, x2):
         """Trim data to only points where x1 <= x <= x2
 
         Assumes that the graph x-values are monotonic."""
-        try:
-            a = next(i for i in xrange(len(self.X)) if self.X[i] >= x1)
-        except StopIteration:# failed to match
-            a = b = 0
+        a = self.data.search(x1, 'left')
+        b = max(a, self.data.search(x2, 'right'))
+        n = len(self)
+        self.data.keep(a, b)
+        if b < n:# Dropped from the end too, extrema must be rebuilt
+            self._reset_extrema()
         else:
-            try:
-                b = next(i for i in xrange(len(self.X)-1, a, -1) if self.X[i] <= x2) + 1
-            except StopIteration:# failed to match
-                b = len(self.X)
-
-        self.X = self.X[a:b]
-        self.Y = self.Y[a:b]
+            self._evict()
         self.recompute_bbox()
 
     def trim_to_count(self, n):
         """Trim to the most recently added n points"""
-        self.X = self.X[-n:]
-        self.Y = self.Y[-n:]
+        self.data.drop(len(self) - n)
+        self._evict()
         self.recompute_bbox()
 
+    def _evict(self):
+        """Drop points no longer in storage from the extrema trackers"""
+        first = self._count - len(self)
+        if self._xext is not None:
+            self._xext.evict(first)
+        self._yext.evict(first)
+        if self.lod is not None:
+            if len(self):
+                self.lod.drop_before(self.data.x_at(0))
+            else:
+                self.lod.clear()
+        self._stale = True
+
+    def _reset_extrema(self):
+        """Rebuild the extrema trackers and LOD pyramid from the stored data, O(n)"""
+        X, Y = numpy.asarray(self.X, dtype=float), numpy.asarray(self.Y, dtype=float)
+        self._count += len(Y)
+        self._xext = None
+        self._yext.clear()
+        self._yext.push_many(self._count - len(Y), Y)
+        if not _is_sorted(X):
+            self._track_x()
+        if self.lod is not None:
+            self.lod.clear()
+            self.lod.extend(X, Y)
+        self._stale = True
+
+    def _track_x(self):
+        """Start tracking x-extrema with deques once X is no longer sorted.
+
+        While X is sorted (the usual case) its extents are simply the first
+        and last points, which avoids a deque entry per point.
+        """
+        self._xext = _SlidingExtrema()
+        self._xext.push_many(self._count - len(self), numpy.asarray(self.X, dtype=float))
+
     def initial_point(self, x, y):
         """Initialization of min and max values. Called automatically"""
         if self.xmin is None:
@@ -107,13 +388,26 @@ class Series(object):
         self.empty = False
 
     def recompute_bbox(self):
-        """Internal method: Called automatically when line is trimmed"""
+        """Internal method: Called automatically when line is trimmed
+
+        The data extents are maintained incrementally as points are added
+        and dropped, so this is O(1) regardless of the series length.
+        """
+        self._stale = False
         if not len(self):
             self.empty = True
+            self.xmin, self.xmax = self._xmin, self._xmax
+            self.ymin, self.ymax = self._ymin, self._ymax
+            return
+        if not (self._yext and (self._xext is None or self._xext)):
             return
 
-        self.xmin, self.xmax = min(self.X), max(self.X)
-        self.ymin, self.ymax = min(self.Y), max(self.Y)
+        self.empty = False
+        if self._xext is None:
+            self.xmin, self.xmax = self.data.x_at(0), self.data.x_at(len(self)-1)
+        else:
+            self.xmin, self.xmax = self._xext.min, self._xext.max
+        self.ymin, self.ymax = self._yext.min, self._yext.max
 
         if self._xmin is not None and self.xmin > self._xmin: self.xmin = self._xmin
         if self._xmax is not None and self.xmax < self._xmax: self.xmax = self._xmax
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Shared-memory ring buffers for feeding graphs from another process"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+__all__ = 'SharedRingWriter SharedRingReader'.split()
+
+import mmap, os
+import numpy
+
+# Header: 8 uint64 slots
+MAGIC = 0x3152494e47575841 # "AXWGNIR1"
+H_MAGIC, H_CAPACITY, H_GENERATION, H_SEQ, H_WRITING = range(5)
+HEADER_BYTES = 64
+
+
+def _map(fh, length, writable):
+    access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+    mm = mmap.mmap(fh.fileno(), length, access=access)
+    header = numpy.frombuffer(mm, dtype=numpy.uint64, count=8)
+    return mm, header
+
+
+def _ring(mm, capacity):
+    X = numpy.frombuffer(mm, dtype=numpy.float64, count=capacity, offset=HEADER_BYTES)
+    Y = numpy.frombuffer(mm, dtype=numpy.float64, count=capacity, offset=HEADER_BYTES + 8*capacity)
+    return X, Y
+
+
+def _read_header(path):
+    """Header of an existing segment file, or None"""
+    try:
+        header = numpy.fromfile(path, dtype=numpy.uint64, count=8)
+    except (IOError, OSError, ValueError):
+        return None
+    if len(header) < 8 or header[H_MAGIC] != MAGIC:
+        return None
+    return header
+
+
+def _unmap(mm):
+    try:
+        mm.close()
+    except BufferError:
+        pass # Views still exported somewhere, leave it to the garbage collector
+
+
+class SharedRingWriter(object):
+    """Single-writer ring of float64 points in a memory-mapped file.
+
+    Use a file on a RAM-backed filesystem (e.g., C{/dev/shm}) for a pure
+    shared-memory segment. Writes are published seqlock style: the writer
+    first announces the sequence number it is writing up to (C{H_WRITING}),
+    fills the ring slots, then advances the sequence counter (total points
+    ever written). Readers need no lock; they discard anything the
+    announced writes may have overwritten while they were copying.
+
+    Reopening an existing segment (writer restart) resets the sequence
+    counter and then bumps the generation counter so that readers resync.
+    A restart with a different capacity writes a new file and renames it
+    over the old one before bumping the old segment's generation, so that
+    readers still mapping the old file never read past its end; they
+    reopen the path when they notice the generation change.
+    """
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = int(capacity)
+        size = HEADER_BYTES + 16*self.capacity
+
+        old = _read_header(path)
+        generation = int(old[H_GENERATION]) if old is not None else 0
+        if old is not None and os.path.getsize(path) == size:
+            self._fh = open(path, 'r+b')
+            self._mm, self.header = _map(self._fh, size, True)
+            self.header[H_SEQ] = 0
+            self.header[H_WRITING] = 0
+            self.header[H_GENERATION] = generation + 1
+        else:
+            retired = open(path, 'r+b') if old is not None else None
+            tmp = "{}.{}.tmp".format(path, os.getpid())
+            self._fh = open(tmp, 'w+b')
+            self._fh.truncate(size)
+            self._mm, self.header = _map(self._fh, size, True)
+            self.header[H_CAPACITY] = self.capacity
+            self.header[H_MAGIC] = MAGIC
+            self.header[H_GENERATION] = generation + 2
+            os.rename(tmp, path)
+            if retired is not None:
+                # Readers still map the old file: tell them to reopen the path
+                mm, header = _map(retired, HEADER_BYTES, True)
+                header[H_GENERATION] = generation + 1
+                del header
+                mm.close()
+                retired.close()
+        self.seq = 0
+        self.X, self.Y = _ring(self._mm, self.capacity)
+
+    def append(self, x, y):
+        i = self.seq % self.capacity
+        self.header[H_WRITING] = self.seq + 1
+        self.X[i] = x
+        self.Y[i] = y
+        self.seq += 1
+        self.header[H_SEQ] = self.seq
+
+    def extend(self, xs, ys):
+        cap, k = self.capacity, len(xs)
+        seq = self.seq
+        if k > cap:
+            seq += k - cap
+            xs, ys, k = xs[k-cap:], ys[k-cap:], cap
+        self.header[H_WRITING] = seq + k
+        i = seq % cap
+        n = min(k, cap - i)
+        self.X[i:i+n], self.Y[i:i+n] = xs[:n], ys[:n]
+        if n < k:
+            self.X[:k-n], self.Y[:k-n] = xs[n:], ys[n:]
+        self.seq = seq + k
+        self.header[H_SEQ] = self.seq
+
+    def close(self):
+        del self.header, self.X, self.Y
+        self._mm.close()
+        self._fh.close()
+
+
+class SharedRingReader(object):
+    """Reader side of a L{SharedRingWriter} segment.
+
+    Usable as a graph data source (see C{RealtimeGraph.attach_source}):
+    C{drain()} returns all points published since the previous call. If
+    the reader falls more than a full ring behind, the overwritten points
+    are skipped and counted in C{stats['lost']}; writer restarts are
+    detected by the generation counter (the segment is then reopened, its
+    capacity may have changed) and counted in C{stats['restarts']}.
+
+    @param backfill: start with the points already in the ring rather than
+        only those published after opening
+    """
+    def __init__(self, path, backfill=True):
+        self.path = path
+        self.stats = dict(read=0, lost=0, restarts=0)
+        self._open()
+        self.last = 0 if backfill else int(self.header[H_SEQ])
+
+    def _open(self):
+        fh = open(self.path, 'rb')
+        try:
+            mm, header = _map(fh, 0, False)
+        except Exception:
+            fh.close()
+            raise
+        capacity = int(header[H_CAPACITY])
+        if header[H_MAGIC] != MAGIC or len(mm) < HEADER_BYTES + 16*capacity:
+            del header
+            _unmap(mm)
+            fh.close()
+            raise ValueError("{} is not a shared ring segment".format(self.path))
+        self._fh, self._mm, self.header = fh, mm, header
+        self.capacity = capacity
+        self.generation = int(header[H_GENERATION])
+        self.X, self.Y = _ring(mm, capacity)
+
+    def _reopen(self):
+        """Map the segment currently at path. Returns False if not (yet) possible."""
+        old = self._fh, self._mm
+        try:
+            self._open()
+        except (IOError, OSError, ValueError):
+            return False
+        _unmap(old[1])
+        old[0].close()
+        return True
+
+    def __len__(self):
+        """Number of points waiting (approximate while the writer restarts)"""
+        seq = int(self.header[H_SEQ])
+        if int(self.header[H_GENERATION]) != self.generation:
+            return max(1, seq)
+        return max(0, seq - self.last)
+
+    def drain(self):
+        """Returns C{(X, Y)} arrays of the newly published points"""
+        empty = numpy.empty(0), numpy.empty(0)
+        g1 = int(self.header[H_GENERATION])
+        if g1 != self.generation:
+            if not self._reopen():
+                return empty
+            self.last = 0
+            self.stats['restarts'] += 1
+            g1 = self.generation
+
+        seq = int(self.header[H_SEQ])
+        if seq < self.last:
+            return empty # Counter reset, generation bump pending
+
+        cap = self.capacity
+        start = self.last
+        if seq - start > cap:
+            self.stats['lost'] += seq - cap - start
+            start = seq - cap
+        if seq == start:
+            return empty
+
+        i, k = start % cap, seq - start
+        n = min(k, cap - i)
+        if n < k:
+            X = numpy.concatenate((self.X[i:], self.X[:k-n]))
+            Y = numpy.concatenate((self.Y[i:], self.Y[:k-n]))
+        else:
+            X, Y = self.X[i:i+k].copy(), self.Y[i:i+k].copy()
+
+        if int(self.header[H_GENERATION]) != g1:
+            return empty # Restarted while copying, resync next time
+
+        # Writes announced since we read seq (including any not yet
+        # published) may have overwritten the oldest copied slots
+        overrun = int(self.header[H_WRITING]) - cap - start
+        if overrun > 0:
+            X, Y = X[overrun:], Y[overrun:]
+            self.stats['lost'] += min(overrun, k)
+
+        self.last = seq
+        self.stats['read'] += len(X)
+        return X, Y
+
+    def close(self):
+        del self.header, self.X, self.Y
+        self._mm.close()
+        self._fh.close()
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""Data series storage engines"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+__all__ = 'ListStorage ArrayStorage RingStorage MemmapStorage'.split()
+
+import array, bisect, os
+import numpy
+
+
+class ListStorage(object):
+    """Unbounded storage in plain python lists.
+
+    Points dropped from the front are only marked dead; the lists are
+    compacted once at least half of their contents is dead so that
+    dropping is amortized O(1) per point. X and Y are read-only: they are
+    the storage lists themselves only while no points are marked dead and
+    slices otherwise, so append through the storage (or series) instead.
+    """
+    def __init__(self, X=None, Y=None):
+        self._x = [] if X is None else X
+        self._y = [] if Y is None else Y
+        self._start = 0
+
+    def __len__(self):
+        return len(self._x) - self._start
+
+    @property
+    def X(self):
+        return self._x[self._start:] if self._start else self._x
+
+    @property
+    def Y(self):
+        return self._y[self._start:] if self._start else self._y
+
+    def _compact(self):
+        if self._start:
+            del self._x[:self._start]
+            del self._y[:self._start]
+            self._start = 0
+
+    def x_at(self, i):
+        return self._x[self._start + i]
+
+    def append(self, x, y):
+        self._x.append(x)
+        self._y.append(y)
+
+    def extend(self, xs, ys):
+        """Append a block of points (numpy arrays)"""
+        self._x.extend(xs.tolist())
+        self._y.extend(ys.tolist())
+
+    def search(self, x, side='left'):
+        """Index at which x would be inserted into the (monotonic) x-data"""
+        find = bisect.bisect_left if side == 'left' else bisect.bisect_right
+        return find(self._x, x, self._start) - self._start
+
+    def drop(self, n):
+        """Drop the oldest n points"""
+        self._start = min(len(self._x), self._start + max(0, n))
+        if 2*self._start >= len(self._x):
+            self._compact()
+
+    def keep(self, a, b):
+        """Retain only points with index a <= i < b"""
+        a, b, _ = slice(a, b).indices(len(self))
+        del self._x[self._start + max(a, b):]
+        del self._y[self._start + max(a, b):]
+        self.drop(a)
+
+
+class ArrayStorage(ListStorage):
+    """Unbounded compact storage in typed C{array.array} buffers.
+
+    Each coordinate costs 8 (C{'float64'}) or 4 (C{'float32'}) bytes
+    rather than a python float object plus a list slot. Dropping works as
+    for L{ListStorage}. X and Y are numpy copies since a view would pin
+    the buffers and prevent further appends; each copy is O(n), so it is
+    kept (and returned again, do not modify it) until points are added or
+    dropped. A graph line holds on to the arrays it draws anyway, so this
+    costs no extra memory while the series is displayed.
+    """
+    TYPECODES = dict(float64='d', float32='f')
+
+    def __init__(self, dtype='float64', X=None, Y=None):
+        self.dtype = numpy.dtype(dtype)
+        if self.dtype.name not in self.TYPECODES:
+            raise ValueError("Unsupported array storage dtype {}".format(dtype))
+        code = str(self.TYPECODES[self.dtype.name])
+        super(ArrayStorage,self).__init__(array.array(code), array.array(code))
+        self._copies = dict() # buffer name -> (buffer length, numpy copy)
+        if X is not None:
+            self.extend(numpy.asarray(X), numpy.asarray(Y))
+
+    def _values(self, name):
+        buf = getattr(self, name)
+        cached = self._copies.get(name)
+        if cached is not None and cached[0] == len(buf):
+            return cached[1]
+        if len(buf) <= self._start:
+            values = numpy.empty(0, dtype=self.dtype)
+        else:
+            values = numpy.frombuffer(buf, dtype=self.dtype)[self._start:].copy()
+        self._copies[name] = (len(buf), values)
+        return values
+
+    @property
+    def X(self):
+        return self._values('_x')
+
+    @property
+    def Y(self):
+        return self._values('_y')
+
+    def drop(self, n):
+        """Drop the oldest n points"""
+        self._copies.clear()
+        super(ArrayStorage,self).drop(n)
+
+    def keep(self, a, b):
+        """Retain only points with index a <= i < b"""
+        self._copies.clear()
+        super(ArrayStorage,self).keep(a, b)
+
+    def extend(self, xs, ys):
+        """Append a block of points (numpy arrays)"""
+        for buf, vals in ((self._x, xs), (self._y, ys)):
+            raw = numpy.ascontiguousarray(vals, dtype=self.dtype).tobytes()
+            (buf.frombytes if hasattr(buf, 'frombytes') else buf.fromstring)(raw)
+
+
+class RingStorage(object):
+    """Fixed-capacity storage in preallocated numpy ring buffers.
+
+    Once full, each append silently drops the oldest point. Appending and
+    dropping are O(1) and never allocate. Each buffer is twice the capacity
+    and every value is written at both C{i} and C{i + capacity} so that the
+    retained data is always available as a single contiguous view (no
+    copying required when handing the data to matplotlib).
+    """
+    def __init__(self, capacity, dtype=numpy.float64, X=None, Y=None):
+        self.capacity = int(capacity)
+        if self.capacity < 1:
+            raise ValueError("Ring storage capacity must be positive")
+        self.dtype  = numpy.dtype(dtype)
+        self._x     = numpy.zeros(2*self.capacity, dtype=self.dtype)
+        self._y     = numpy.zeros(2*self.capacity, dtype=self.dtype)
+        self._start = 0
+        self._len   = 0
+        if X is not None:
+            self.extend(numpy.asarray(X), numpy.asarray(Y))
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def X(self):
+        return self._x[self._start:self._start+self._len]
+
+    @property
+    def Y(self):
+        return self._y[self._start:self._start+self._len]
+
+    def x_at(self, i):
+        return self._x[self._start + i]
+
+    def append(self, x, y):
+        cap = self.capacity
+        if self._len == cap:
+            self._start = (self._start + 1) % cap
+            self._len -= 1
+        i = (self._start + self._len) % cap
+        self._x[i] = self._x[i+cap] = x
+        self._y[i] = self._y[i+cap] = y
+        self._len += 1
+
+    def extend(self, xs, ys):
+        """Append a block of points (numpy arrays)
+
+        Blocks larger than the capacity keep only their final points.
+        """
+        cap, k = self.capacity, len(xs)
+        if k >= cap:
+            xs, ys, k = xs[k-cap:], ys[k-cap:], cap
+            self._start, self._len = 0, 0
+        elif self._len + k > cap:
+            self.drop(self._len + k - cap)
+        i = (self._start + self._len) % cap
+        for buf, vals in ((self._x, xs), (self._y, ys)):
+            n = min(k, cap - i)
+            buf[i:i+n] = buf[i+cap:i+cap+n] = vals[:n]
+            if n < k:
+                buf[:k-n] = buf[cap:cap+k-n] = vals[n:]
+        self._len += k
+
+    def search(self, x, side='left'):
+        """Index at which x would be inserted into the (monotonic) x-data"""
+        return int(self.X.searchsorted(x, side))
+
+    def drop(self, n):
+        """Drop the oldest n points"""
+        self.keep(max(0, n), self._len)
+
+    def keep(self, a, b):
+        """Retain only points with index a <= i < b"""
+        a, b, _ = slice(a, b).indices(self._len)
+        if b <= a:
+            self._start, self._len = 0, 0
+        else:
+            self._start = (self._start + a) % self.capacity
+            self._len   = b - a
+
+
+class MemmapStorage(object):
+    """Append-only recording of points in a memory-mapped binary file.
+
+    The file holds a 64-byte header (magic, format version, dtype code,
+    point count) followed by C{(x, y)} records. Only the pages in use stay
+    resident, the OS pages old data out, and X/Y are zero-copy (strided)
+    views of the mapping. The file grows geometrically as points are
+    appended; the header count is updated with every append so that the
+    file can be reopened at any time (e.g., to build a static graph).
+
+    Dropping points (from either end, e.g., by C{trim_to_domain()}) only
+    narrows the window onto the recording; the recording itself is never
+    modified, so a read-only recording can be trimmed for display.
+    Appending always writes at the end of the recording and makes the window
+    follow the recording again, so points hidden by an end trim reappear.
+
+    @param path: recording file, created when missing, else reopened
+    @param dtype: C{'float64'} or C{'float32'}; ignored when reopening
+    @param readonly: map an existing recording read-only
+    @param reserve: initial number of records to reserve in a new file
+    """
+    MAGIC   = 0x31524553585743 # "CWXSER1"
+    VERSION = 1
+    DTYPES  = ('float64', 'float32')
+    HEADER_BYTES = 64
+    H_MAGIC, H_VERSION, H_DTYPE, H_COUNT = range(4)
+
+    def __init__(self, path, dtype='float64', readonly=False, reserve=65536):
+        self.path = path
+        self.readonly = readonly
+        if os.path.exists(path):
+            header = numpy.fromfile(path, dtype=numpy.uint64, count=8)
+            if len(header) < 4 or header[self.H_MAGIC] != self.MAGIC:
+                raise ValueError("{} is not a series recording".format(path))
+            if header[self.H_VERSION] != self.VERSION:
+                raise ValueError("Unsupported series recording version {}".format(header[self.H_VERSION]))
+            self.dtype = numpy.dtype(self.DTYPES[int(header[self.H_DTYPE])])
+            capacity = (os.path.getsize(path) - self.HEADER_BYTES) // (2*self.dtype.itemsize)
+        elif readonly:
+            raise IOError("No such series recording: {}".format(path))
+        else:
+            self.dtype = numpy.dtype(dtype)
+            capacity = reserve
+            with open(path, 'wb') as fh:
+                header = numpy.zeros(8, dtype=numpy.uint64)
+                header[self.H_MAGIC]   = self.MAGIC
+                header[self.H_VERSION] = self.VERSION
+                header[self.H_DTYPE]   = self.DTYPES.index(self.dtype.name)
+                header.tofile(fh)
+        self._header = numpy.memmap(path, dtype=numpy.uint64, mode=('r' if readonly else 'r+'), shape=(8,))
+        self._map(capacity)
+        self._start = 0
+        self._end   = None # Window end, None to follow the recording
+
+    def _map(self, capacity):
+        size = self.HEADER_BYTES + 2 * capacity * self.dtype.itemsize
+        if not self.readonly and os.path.getsize(self.path) < size:
+            with open(self.path, 'r+b') as fh:
+                fh.truncate(size)
+        self._rows = numpy.memmap(
+            self.path, dtype=self.dtype, mode=('r' if self.readonly else 'r+'),
+            offset=self.HEADER_BYTES, shape=(max(1, capacity), 2),
+        )
+
+    @property
+    def _count(self):
+        return int(self._header[self.H_COUNT])
+
+    @property
+    def _stop(self):
+        return self._count if self._end is None else self._end
+
+    def __len__(self):
+        return self._stop - self._start
+
+    @property
+    def X(self):
+        return self._rows[self._start:self._stop, 0]
+
+    @property
+    def Y(self):
+        return self._rows[self._start:self._stop, 1]
+
+    def x_at(self, i):
+        return self._rows[self._start + i, 0]
+
+    def _reserve(self, k):
+        n = self._count + k
+        if n > len(self._rows):
+            self._rows.flush()
+            self._map(max(n, 2*len(self._rows)))
+
+    def append(self, x, y):
+        self._end = None
+        self._reserve(1)
+        n = self._count
+        self._rows[n] = (x, y)
+        self._header[self.H_COUNT] = n + 1
+
+    def extend(self, xs, ys):
+        """Append a block of points (numpy arrays)"""
+        self._end = None
+        self._reserve(len(xs))
+        n = self._count
+        self._rows[n:n+len(xs), 0] = xs
+        self._rows[n:n+len(xs), 1] = ys
+        self._header[self.H_COUNT] = n + len(xs)
+
+    def search(self, x, side='left'):
+        """Index at which x would be inserted into the (monotonic) x-data"""
+        return int(self.X.searchsorted(x, side))
+
+    def drop(self, n):
+        """Drop the oldest n points (from the window, not the recording)"""
+        self._start = min(self._stop, self._start + max(0, n))
+
+    def keep(self, a, b):
+        """Retain only points with index a <= i < b (in the window, not the recording)"""
+        a, b, _ = slice(a, b).indices(len(self))
+        if b < len(self):
+            self._end = self._start + max(a, b)
+        self.drop(a)
+
+    def reset_window(self):
+        """Show the whole recording again"""
+        self._start, self._end = 0, None
+
+    def flush(self):
+        """Write dirty pages to disk"""
+        self._rows.flush()
+        self._header.flush()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""Off-main-thread Agg rendering for real-time graphs"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+__all__ = 'AggRenderer ThreadedGraph'.split()
+
+from acwx.wx  import subwidget, Widget
+from .graph   import _GraphCore, _FrameScheduler
+
+import threading
+from collections import namedtuple
+import numpy
+import wx
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+Frame = namedtuple('Frame', 'seq size dpi title styles plot_kwargs bounds data')
+_Style = namedtuple('_Style', 'name axis color format X Y')
+
+# matplotlib is not thread-safe: renderer threads draw one at a time
+_render_lock = threading.Lock()
+
+
+def bitmap_from_rgba(width, height, rgba):
+    if hasattr(wx.Bitmap, 'FromBufferRGBA'):
+        return wx.Bitmap.FromBufferRGBA(width, height, rgba)
+    return wx.BitmapFromBufferRGBA(width, height, rgba)
+
+
+class _OffscreenGraph(_GraphCore):
+    """Worker thread's private copy of a graph figure, drawn with Agg"""
+    def __init__(self):
+        self.fig    = Figure()
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.init_graph()
+        self.styles = None
+
+    def render(self, frame):
+        """Draw a L{Frame}. Returns C{(width, height, rgba_bytes)}."""
+        width, height = frame.size
+        self.fig.set_dpi(frame.dpi)
+        self.fig.set_size_inches(width / frame.dpi, height / frame.dpi)
+
+        if (frame.styles, frame.plot_kwargs) != self.styles:
+            for line in self.__dict__.pop('lines', ()):
+                line.remove()
+            self.styles = (frame.styles, frame.plot_kwargs)
+            self.plot_kwargs = frame.plot_kwargs
+            self.series = [ _Style(*style, X=(), Y=()) for style in frame.styles ]
+            self.update_legend()
+
+        if frame.title != self.title:
+            self.title = frame.title
+        for line, data in zip(self.lines, frame.data):
+            line.set_data(*data)
+        self.apply_bounds(frame.bounds)
+        self.canvas.draw()
+        width, height = self.canvas.get_width_height()
+        return width, height, bytes(self.canvas.buffer_rgba())
+
+
+class AggRenderer(threading.Thread):
+    """Renders graph frames on a worker thread.
+
+    Frames are plain snapshots (see L{Frame}) submitted from the GUI
+    thread. The worker draws them on its own figure and hands the finished
+    RGBA buffer to C{deliver(seq, width, height, rgba)} on the GUI thread.
+    The figure is never touched by the GUI thread, and the workers of all
+    renderers draw under one module-level lock, so no two renderers are in
+    matplotlib at the same time. Figures drawn on the GUI thread (e.g.,
+    other C{RealtimeGraph}s) are not covered by the lock; they share no
+    artists with the renderers' figures.
+
+    Only the newest frame matters: a frame replaced before its render
+    starts is counted in C{stats['dropped']}, and a finished frame is
+    discarded (C{stats['stale']}) when newer data are already waiting.
+    After C{max_stale} consecutive discards a frame is delivered anyway,
+    so that the display keeps moving while data arrive faster than frames
+    can be rendered.
+    """
+    def __init__(self, deliver, max_stale=2):
+        super(AggRenderer,self).__init__()
+        self.daemon    = True
+        self.deliver   = deliver
+        self.max_stale = max_stale
+        self.stats     = dict(submitted=0, rendered=0, dropped=0, stale=0, errors=0)
+        self.error     = None
+        self._cond     = threading.Condition()
+        self._pending  = None
+        self._stopped  = False
+
+    def submit(self, frame):
+        with self._cond:
+            if self._pending is not None:
+                self.stats['dropped'] += 1
+            self._pending = frame
+            self.stats['submitted'] += 1
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending = None
+            self._cond.notify()
+
+    def run(self):
+        with _render_lock:
+            graph = _OffscreenGraph()
+        stale = 0
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                frame, self._pending = self._pending, None
+
+            try:
+                with _render_lock:
+                    image = graph.render(frame)
+            except Exception as err:
+                self.error = err
+                self.stats['errors'] += 1
+                continue
+
+            with self._cond:
+                if self._stopped:
+                    return
+                if self._pending is not None and stale < self.max_stale:
+                    self.stats['stale'] += 1
+                    stale += 1
+                    continue
+                self.stats['rendered'] += 1
+                stale = 0
+            wx.CallAfter(self.deliver, frame.seq, *image)
+
+
+class ThreadedGraph(_GraphCore, _FrameScheduler, Widget):
+    """Real-time graph which renders on a worker thread.
+
+    Offers the C{RealtimeGraph} series API and axis options (except blit).
+    A redraw only computes the axis bounds and the (decimated) display data
+    on the GUI thread, copies them into a L{Frame} and queues it for an
+    L{AggRenderer}. The finished image is shown as a bitmap, so the GUI
+    stays responsive however long the figure takes to draw. Use decimation
+    or a LOD pyramid to keep the snapshots small.
+    """
+
+    def __init__(self, parent, bbox=None, bbox2=None, initial_bbox=None, initial_bbox2=None, pad=None, xpad=0, ypad=0, ypad2=0, max_fps=None, autoscale=None, dpi=None, **kwargs):
+        """
+        @param dpi: figure resolution (default: matplotlib's C{figure.dpi})
+
+        See C{RealtimeGraph} for the remaining options.
+        """
+        super(ThreadedGraph,self).__init__(parent, **kwargs)
+        self.init_graph(bbox, bbox2, initial_bbox, initial_bbox2, pad, xpad, ypad, ypad2, False, autoscale)
+        self.dpi    = dpi or matplotlib.rcParams['figure.dpi']
+        self.seq    = 0
+        self.shown  = 0
+        self.bitmap = None
+        self._title = ""
+        self.renderer = AggRenderer(self.on_frame)
+        self.sizer.Add(self.view, 1, wx.EXPAND)
+        self.view.SetBackgroundStyle(getattr(wx, 'BG_STYLE_PAINT', wx.BG_STYLE_CUSTOM))
+        self.view.Bind(wx.EVT_PAINT, self.on_paint)
+        self.view.Bind(wx.EVT_SIZE, self.on_view_size)
+        self.init_frames(max_fps)
+        self.renderer.start()
+
+    def redraw(self):
+        """Queue a frame of the current data for rendering"""
+        width, height = self.view.GetClientSize()
+        if width <= 0 or height <= 0:
+            return
+        bounds = self.compute_bounds()
+        if bounds is None:
+            return
+
+        xmin, xmax = (bounds[0] or bounds[1])[:2]
+        rc = matplotlib.rcParams
+        pixels = int(width * (rc['figure.subplot.right'] - rc['figure.subplot.left']))
+        data = [ tuple(numpy.array(v, dtype=float) for v in series.display_data(pixels, xmin, xmax))
+                 for series in self.series ]
+        styles = tuple( (s.name, s.axis, s.color, s.format) for s in self.series )
+
+        self.seq += 1
+        self.renderer.submit(Frame(self.seq, (width, height), self.dpi, self.title,
+                                   styles, dict(self.plot_kwargs), bounds, data))
+
+    def on_frame(self, seq, width, height, rgba):
+        if not self or seq <= self.shown:
+            return
+        self.shown  = seq
+        self.bitmap = bitmap_from_rgba(width, height, rgba)
+        self.view.Refresh(False)
+
+    def on_paint(self, event):
+        dc = wx.PaintDC(self.view)
+        if self.bitmap is not None:
+            dc.DrawBitmap(self.bitmap, 0, 0)
+
+    def on_view_size(self, event):
+        event.Skip()
+        self.request_redraw()
+
+    def on_destroy(self, event):
+        if event.GetEventObject() is self:
+            self.renderer.stop()
+        super(ThreadedGraph,self).on_destroy(event)
+
+    @property
+    def title(self):
+        return self._title
+    @title.setter
+    def title(self, title):
+        self._title = title
+        self.request_redraw()
+
+    @subwidget
+    def view(self):
+        """Window showing the rendered frames"""
+        return wx.Panel(self)
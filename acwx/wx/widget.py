@@ -10,7 +10,8 @@ from __future__ import division, absolute_import, print_function, unicode_litera
 __all__ = 'widget subwidget WidgetMixin Widget Dialog GridWidget ScrolledWidget'.split()
 
 import wx, weakref, wx.lib.scrolledpanel, json, six
-from acwx import cached_property
+from contextlib import contextmanager
+from acwx import cached_property, locked_cached_property, StashCache, ContextualCounter
 from .util import BORDER_SIZE
 import acwx.wx.util
 
@@ -29,6 +30,9 @@ class subwidget(widget):
 
 
 class WidgetMixin(object):
+    # Read the stash through the shared StashCache (see stash_cache)
+    cache_stash = False
+
     @cached_property
     def large_font(self):
         return wx.Font(24, wx.DEFAULT, wx.NORMAL, wx.NORMAL)
@@ -91,34 +95,63 @@ class WidgetMixin(object):
         for w in self.subwidgets:
             w.Enable(enable)
 
-    @cached_property
+    @locked_cached_property(depends=('parent', 'app'))
     def machine(self):
         return self.parent.machine  if hasattr(self.parent, "machine")   else self.app.machine
     @property
     def galil(self):
         return self.app.galil
-    @cached_property
+    @locked_cached_property(depends=('parent', 'app'))
     def settings(self):
         return self.parent.settings if hasattr(self.parent, "settings")  else self.app.settings
-    @cached_property
+    @locked_cached_property(depends=('parent', 'app'))
     def stash(self):
         return self.parent.stash    if hasattr(self.parent, "stash")     else self.app.stash
     @property
     def user(self):
         return self.app.user
 
+    @locked_cached_property(depends=('stash',))
+    def stash_cache(self):
+        """Read-through cache in front of stash, shared by all its users
+
+        The stash helpers only use it in classes setting C{cache_stash}.
+        Values read (including absent keys) are then kept for the life of
+        the process: the cache only sees writes made through it, so after
+        writing to the stash any other way (e.g., C{app.stash.set()}) call
+        C{stash_cache.invalidate(namespace)}.
+        """
+        return StashCache.of(self.stash)
+
+    @property
+    def _stash_store(self):
+        return self.stash_cache if self.cache_stash else self.stash
+
     def get_stash(self, key, dflt=None):
-        return self.stash.get(self.stash_namespace + key, dflt)
+        return self._stash_store.get(self.stash_namespace + key, dflt)
     def set_stash(self, key, value):
-        return self.stash.set(self.stash_namespace + key, value)
+        return self._stash_store.set(self.stash_namespace + key, value)
 
     def json_get_stash(self, key, dflt=None):
         val = self.get_stash(key, None)
-        return dflt if val is None else json.loads(val)
+        if val is None:
+            return dflt
+        if self.cache_stash:
+            return self.stash_cache.decode(self.stash_namespace + key, val)
+        return json.loads(val)
     def json_set_stash(self, key, value):
         val = None if value is None else json.dumps(value, separators=(',',':'))
         return self.set_stash(key, val)
 
+    def preload_stash(self, namespace=None):
+        """Fetch all stash values of a namespace (default: this widget's) in one call
+
+        Only with C{cache_stash}; returns None otherwise.
+        """
+        if not self.cache_stash:
+            return None
+        return self.stash_cache.preload(self.stash_namespace if namespace is None else namespace)
+
     def _(self, term):
         return self.app.term(term)
 
@@ -240,6 +273,11 @@ class GridWidget(Widget):
         self._sizer_row_names = dict()
         self._sizer_last_row  = -1
         self._row_visibility  = dict()
+        self._lazy_rows       = dict()
+        self._row_items       = dict()# row -> refs of the sizer items covering it
+        self._row_items_count = 0     # sizer items in the row index
+        self._row_batch       = ContextualCounter()
+        self._row_relayout    = False
 
     def iter_col(self, col):
         for row in xrange(self.sizer.GetRows()):
@@ -287,16 +325,40 @@ class GridWidget(Widget):
         @param border: border size
         @param grow: boolean, will create a growable row when C{True}
         """
-        name   = kwargs.get("name",   None)
-        row    = kwargs.get("row",    None)
-        font   = kwargs.get("font",   self.default_font)
-        span   = kwargs.get("span",   (1,))
-        flag   = kwargs.get("flag",   self.default_flag)
-        border = kwargs.get("border", self.default_border)
+        row = self._claim_row(kwargs.get("row", None), kwargs.get("name", None))
+        self._fill_row(row, items, kwargs)
 
-        if span and not isinstance(span, (list,tuple)):
-            span = (span,)
+    def add_lazy_row(self, name, factory, show=False, **kwargs):
+        """Reserves a named row whose items are only created when first shown.
+
+        C{factory()} returns the row items, as would be passed to
+        C{add_grid_row()}. It is called the first time C{show_row()} shows
+        the row (or by C{build_row()}), so rows which are never shown cost
+        no windows at all; this includes any L{subwidget}s which only the
+        factory touches. Until then, the row counts as hidden.
 
+        @param show: show (and thus build) the row immediately
+        @param kwargs: as for C{add_grid_row()}
+        """
+        row = self._claim_row(kwargs.pop("row", None), name)
+        self._row_visibility[name] = False
+        self._lazy_rows[name] = (row, factory, kwargs)
+        if show:
+            self.show_row(name)
+        return row
+
+    def build_row(self, name):
+        """Creates the items of a lazy row now. Returns False if already built."""
+        lazy = self._lazy_rows.pop(name, None)
+        if lazy is None:
+            return False
+        row, factory, kwargs = lazy
+        self._fill_row(row, factory(), kwargs)
+        if not self._row_visibility[name]:
+            self._show_cells(row, False)
+        return True
+
+    def _claim_row(self, row, name):
         if row is None:
             row = self._sizer_last_row + 1
         self._sizer_last_row = row
@@ -304,6 +366,16 @@ class GridWidget(Widget):
         if name is not None:
             self._sizer_row_names[name] = row
             self._row_visibility[name]  = True
+        return row
+
+    def _fill_row(self, row, items, kwargs):
+        font   = kwargs.get("font",   self.default_font)
+        span   = kwargs.get("span",   (1,))
+        flag   = kwargs.get("flag",   self.default_flag)
+        border = kwargs.get("border", self.default_border)
+
+        if span and not isinstance(span, (list,tuple)):
+            span = (span,)
 
         col, idx = 0, 0
         for item in items:
@@ -327,7 +399,11 @@ class GridWidget(Widget):
             elif isinstance(item, (wx.StaticText, wx.StaticBitmap)):
                 this_flag |= wx.ALIGN_CENTER_VERTICAL
 
-            self.sizer.Add(item, pos=(row, col), span=(this_row_span, this_col_span), flag=this_flag, border=border)
+            sizer_item = self.sizer.Add(item, pos=(row, col), span=(this_row_span, this_col_span), flag=this_flag, border=border)
+            ref = _item_ref(sizer_item, (row, col))
+            for r in xrange(row, row + this_row_span):
+                self._row_items.setdefault(r, []).append(ref)
+            self._row_items_count += 1
             col += this_col_span
             idx += 1
 
@@ -346,15 +422,96 @@ class GridWidget(Widget):
     def show_row(self, name, show=True):
         row = self.row_num(name)
         self._row_visibility[name] = show
-        for col in xrange(self.sizer.GetCols()):
-            item = self.sizer.FindItemAtPosition((row, col))
-            if item:
-                if hasattr(item, "Show"):
-                    item.Show(show)
-                wind = item.GetWindow()
-                if wind and hasattr(wind, "Show"):
-                    wind.Show(show)
-        self.GetParent().SendSizeEvent()
+        if name in self._lazy_rows:
+            if not show:
+                return
+            self.build_row(name)
+        self._show_cells(row, show)
+        if self._row_batch.depth:
+            self._row_relayout = True
+        else:
+            self.GetParent().SendSizeEvent()
+
+    def show_rows(self, rows):
+        """Shows / hides several rows with a single layout pass
+
+        @param rows: dict (or sequence of pairs) mapping row name to visibility
+        """
+        with self.batch_rows():
+            for name, show in (rows.items() if hasattr(rows, "items") else rows):
+                self.show_row(name, show)
+
+    @contextmanager
+    def batch_rows(self):
+        """Context manager deferring the relayout of C{show_row()} calls.
+
+        The parent is frozen while the block runs and laid out once at the
+        end (if any row changed). Batches may be nested.
+        """
+        outer = not self._row_batch.depth
+        parent = self.GetParent()
+        if outer:
+            self._row_relayout = False
+            parent.Freeze()
+        try:
+            with self._row_batch:
+                yield
+        finally:
+            if outer:
+                if self._row_relayout:
+                    parent.SendSizeEvent()
+                parent.Thaw()
+
+    def _row_cells(self, row):
+        """Sizer items of a row, from the index kept by add_grid_row
+
+        The index holds the windows (sizers, or positions of spacers) of the
+        items, which are looked up in the sizer on use. Items added to (or
+        removed from, e.g., by destroying their window) the sizer directly
+        change its item count or leave references which no longer resolve
+        to an item of the row; the index is then rebuilt from the sizer.
+        """
+        if self.sizer.GetItemCount() != self._row_items_count:
+            self._index_rows()
+        items = self._find_row_items(row)
+        if items is None:
+            self._index_rows()
+            items = self._find_row_items(row)
+        return items or ()
+
+    def _find_row_items(self, row):
+        """Sizer items of the indexed row, None if any is gone or moved"""
+        items = []
+        for ref in self._row_items.get(row, ()):
+            if isinstance(ref, tuple):
+                item = self.sizer.FindItemAtPosition(ref)
+            else:
+                item = self.sizer.FindItem(ref) if ref else None
+            if item is None:
+                return None
+            top = item.GetPos().GetRow()
+            if not top <= row < top + item.GetSpan().GetRowspan():
+                return None
+            items.append(item)
+        return items
+
+    def _index_rows(self):
+        self._row_items = dict()
+        for i, item in enumerate(self.sizer.GetChildren()):
+            pos  = self.sizer.GetItemPosition(i)
+            span = self.sizer.GetItemSpan(i).GetRowspan()
+            ref  = _item_ref(item, (pos.GetRow(), pos.GetCol()))
+            for r in xrange(pos.GetRow(), pos.GetRow() + span):
+                self._row_items.setdefault(r, []).append(ref)
+        self._row_items_count = self.sizer.GetItemCount()
+
+    def _show_cells(self, row, show):
+        for item in self._row_cells(row):
+            if hasattr(item, "Show"):
+                item.Show(show)
+            wind = item.GetWindow()
+            if wind and hasattr(wind, "Show"):
+                wind.Show(show)
 
     def hide_row(self, name, hide=True):
         self.show_row(name, show=not hide)
@@ -365,5 +522,9 @@ class GridWidget(Widget):
     def is_row_visible(self, name):
         return self._row_visibility[name]
 
+def _item_ref(item, pos):
+    """Reference to a sizer item which does not outlive its window"""
+    return item.GetWindow() or item.GetSizer() or pos
+
 class ScrolledWidget(_Widget, wx.lib.scrolledpanel.ScrolledPanel):
     pass
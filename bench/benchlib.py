@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Shared helpers for the acwx benchmark scripts"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import argparse, json, os, platform, sys, time
+from timeit import default_timer
+
+# Benchmark the working tree, not an installed copy
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(func, setup=None, repeat=3, number=1):
+    """Best wall time (seconds) of C{number} calls to func over C{repeat} runs
+
+    C{setup()}, when given, is called (untimed) before each run and its
+    result is passed to func.
+    """
+    best = None
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        t0 = default_timer()
+        for _ in range(number):
+            func() if setup is None else func(arg)
+        t = default_timer() - t0
+        best = t if best is None or t < best else best
+    return best / number
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values)-1, int(round(p / 100 * (len(values)-1))))]
+
+
+def arg_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--output", "-o", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="small sizes only, for smoke testing")
+    return parser
+
+
+def write_results(name, args, results):
+    """Dump results with enough metadata to compare runs between releases"""
+    import acwx
+    doc = dict(
+        benchmark = name,
+        acwx      = acwx.__version__,
+        python    = platform.python_version(),
+        machine   = platform.machine(),
+        platform  = platform.platform(),
+        time      = time.strftime("%Y-%m-%dT%H:%M:%S"),
+        results   = results,
+    )
+    try:
+        import numpy
+        doc['numpy'] = numpy.__version__
+    except ImportError:
+        pass
+    try:
+        import matplotlib
+        doc['matplotlib'] = matplotlib.__version__
+    except ImportError:
+        pass
+
+    text = json.dumps(doc, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark the hit path of the cached_property variants.
+
+    python bench/cached_property.py -o cached_property.json
+
+Reports nanoseconds per attribute access of an already cached value
+(plain attributes and properties are included for reference) and per
+first access (miss) of a fresh instance.
+"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+from benchlib import arg_parser, write_results
+
+import timeit
+
+from acwx.util import cached_property, locked_cached_property, slot_cached_property
+
+
+class Plain(object):
+    def __init__(self):
+        self.value = 1
+
+class Property(object):
+    @property
+    def value(self):
+        return 1
+
+class Cached(object):
+    @cached_property
+    def value(self):
+        return 1
+
+class Locked(object):
+    @locked_cached_property
+    def value(self):
+        return 1
+
+class Slotted(object):
+    __slots__ = ('_value',)
+    @slot_cached_property
+    def value(self):
+        return 1
+
+class SlottedLocked(object):
+    __slots__ = ('_value',)
+    @slot_cached_property(lock=True)
+    def value(self):
+        return 1
+
+VARIANTS = (Plain, Property, Cached, Locked, Slotted, SlottedLocked)
+
+
+def per_call_ns(stmt, setup, number):
+    best = min(timeit.repeat(stmt, setup, number=number, repeat=5))
+    return 1e9 * best / number
+
+
+def main():
+    parser = arg_parser(__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=10**6, help="accesses per timing run")
+    args = parser.parse_args()
+    number = 10**4 if args.quick else args.number
+
+    results = []
+    for cls in VARIANTS:
+        setup = "from __main__ import {0}; inst = {0}(); inst.value".format(cls.__name__)
+        hit  = per_call_ns("inst.value", setup, number) - per_call_ns("inst", setup, number)
+        miss = per_call_ns("{}().value".format(cls.__name__), setup, number // 10) \
+             - per_call_ns("{}()".format(cls.__name__), setup, number // 10)
+        results.append(dict(variant=cls.__name__, hit_ns=hit, miss_ns=miss))
+
+    write_results("cached_property", args, results)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark the Series and RealtimeGraph rendering path.
+
+Runs without a display under Xvfb, for instance:
+
+    xvfb-run -a python bench/graph.py -o graph.json
+
+Results are JSON so that runs can be compared between releases.
+"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+from benchlib import arg_parser, percentile, timed, write_results
+
+import math
+from timeit import default_timer
+
+import numpy
+import wx
+from acwx.wx.graph import RealtimeGraph, Series
+
+
+STORAGE = ('list', 'array', 'ring')
+
+
+def new_series(kind, n):
+    """Empty series able to hold n points"""
+    if kind == 'array':
+        return Series("bench", dtype='float64')
+    return Series("bench", capacity=(n if kind == 'ring' else None))
+
+
+def full_series(kind, n):
+    series = new_series(kind, n)
+    X = numpy.arange(n, dtype=float)
+    series.extend(X, numpy.sin(X / 100))
+    return series
+
+
+def bench_series(sizes):
+    results = []
+    for n in sizes:
+        repeat = 3 if n <= 10**5 else 1
+        for kind in STORAGE:
+            row = dict(kind=kind, points=n)
+            empty = lambda: new_series(kind, n)
+            full  = lambda: full_series(kind, n)
+
+            def add_points(series):
+                for i in range(n):
+                    series.add_point(i, i % 17)
+            row['add_point_ns'] = 1e9 * timed(add_points, empty, repeat=repeat) / n
+
+            block = numpy.arange(4096, dtype=float)
+            def extend(series):
+                for i in range(0, n, 4096):
+                    series.extend(block + i, block)
+            row['extend_4096_ns_per_point'] = 1e9 * timed(extend, empty, repeat=repeat) / n
+
+            row['trim_to_domain_s'] = timed(lambda s: s.trim_to_domain(n/2, n), full, repeat=repeat)
+            row['trim_to_count_s']  = timed(lambda s: s.trim_to_count(n//2), full, repeat=repeat)
+            row['recompute_bbox_s'] = timed(lambda s: s.recompute_bbox(), full, repeat=repeat)
+
+            # Data handed to the line on each redraw, after a new point
+            def display_data(series):
+                series.add_point(n, 0)
+                series.display_data(800)
+            row['display_data_s'] = timed(display_data, full, repeat=repeat)
+            results.append(row)
+    return results
+
+
+def bench_redraw(series_counts, points, seconds, modes):
+    results = []
+    app = wx.App(False)
+    for mode in modes:
+        for naxes in (1, 2):
+            for nseries in series_counts:
+                frame = wx.Frame(None, size=(800, 600))
+                graph = RealtimeGraph(frame, require_app=False, **modes[mode])
+                for i in range(nseries):
+                    graph.add_series("s{}".format(i), axis=i % naxes, capacity=points)
+                X = numpy.arange(points, dtype=float)
+                graph.add_batch(dict((i, (X, numpy.sin(X/50 + i))) for i in range(nseries)), redraw=False)
+                frame.Show()
+                graph.redraw()
+                wx.Yield()
+
+                latency = []
+                x = points
+                t_end = default_timer() + seconds
+                while default_timer() < t_end:
+                    graph.add_batch(dict((i, ([x], [math.sin(x/50 + i)])) for i in range(nseries)), redraw=False)
+                    x += 1
+                    t0 = default_timer()
+                    graph.redraw()
+                    latency.append(default_timer() - t0)
+                frame.Destroy()
+                wx.Yield()
+
+                elapsed = sum(latency)
+                results.append(dict(
+                    mode        = mode,
+                    axes        = naxes,
+                    series      = nseries,
+                    points      = points,
+                    frames      = len(latency),
+                    fps         = len(latency) / elapsed if elapsed else None,
+                    latency_p50 = percentile(latency, 50),
+                    latency_p95 = percentile(latency, 95),
+                    latency_max = max(latency) if latency else None,
+                ))
+    app.Destroy()
+    return results
+
+
+def main():
+    parser = arg_parser(__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", help="series sizes (default 10^3 .. 10^7)")
+    parser.add_argument("--series", type=int, nargs="+", help="series per graph (default 1 2 4 8 16)")
+    parser.add_argument("--points", type=int, default=10000, help="points per series for redraw timing")
+    parser.add_argument("--seconds", type=float, default=2, help="duration of each redraw measurement")
+    args = parser.parse_args()
+
+    sizes  = args.sizes  or ([10**3, 10**4] if args.quick else [10**k for k in range(3, 8)])
+    counts = args.series or ([1, 4] if args.quick else [1, 2, 4, 8, 16])
+    modes  = dict(full=dict(), blit=dict(blit=True))
+    seconds = 0.2 if args.quick else args.seconds
+
+    write_results("graph", args, dict(
+        series = bench_series(sizes),
+        redraw = bench_redraw(counts, args.points, seconds, modes),
+    ))
+
+if __name__ == '__main__':
+    main()
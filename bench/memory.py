@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark the memory footprint of Series storage engines.
+
+    python bench/memory.py -o memory.json
+
+Reports the bytes held per (empty) Series object and per stored point for
+list storage, typed array storage and ring buffers, measured with
+tracemalloc.
+"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+from benchlib import arg_parser, write_results
+
+import gc
+try:
+    import tracemalloc
+except ImportError:# python < 3.4
+    tracemalloc = None
+
+from acwx.wx.graph import Series
+
+
+KINDS = dict(
+    list        = lambda n: dict(),
+    array64     = lambda n: dict(dtype='float64'),
+    array32     = lambda n: dict(dtype='float32'),
+    ring64      = lambda n: dict(capacity=n, dtype='float64'),
+    ring32      = lambda n: dict(capacity=n, dtype='float32'),
+)
+
+
+def allocated(build):
+    """Bytes still allocated by the result of build()"""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    keep = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del keep
+    return size
+
+
+def fill(series, n):
+    for i in range(n):
+        series.add_point(float(i), float(i % 17))
+    return series
+
+
+def bench_objects(count):
+    build = lambda: [ Series("s{}".format(i)) for i in range(count) ]
+    return dict(series=count, bytes_per_series=allocated(build) / count)
+
+
+def bench_points(sizes, nseries):
+    results = []
+    for n in sizes:
+        for kind in sorted(KINDS):
+            build = lambda: [ fill(Series("s", **KINDS[kind](n)), n) for _ in range(nseries) ]
+            results.append(dict(
+                kind   = kind,
+                points = n,
+                series = nseries,
+                bytes_per_point = allocated(build) / (n * nseries),
+            ))
+    return results
+
+
+def main():
+    parser = arg_parser(__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", help="points per series (default 10^3 .. 10^5)")
+    parser.add_argument("--series", type=int, default=20, help="series per measurement")
+    args = parser.parse_args()
+    if tracemalloc is None:
+        parser.error("tracemalloc (python 3.4 or later) is required")
+
+    sizes   = args.sizes or ([1000] if args.quick else [10**3, 10**4, 10**5])
+    nseries = 10 if args.quick else args.series
+
+    write_results("memory", args, dict(
+        objects = bench_objects(1000 if args.quick else 10000),
+        points  = bench_points(sizes, nseries),
+    ))
+
+if __name__ == '__main__':
+    main()
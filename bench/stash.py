@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark stash access through the read cache and write-behind layers.
+
+    python bench/stash.py -o stash.json
+
+Uses an on-disk SQLiteStash. Reports the caller's cost per write for
+synchronous and write-behind stashes (as when dragging a splitter
+rewrites a few keys many times) and per JSON read with and without the
+read-through cache.
+"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+from benchlib import arg_parser, percentile, write_results
+
+import json, os, shutil, tempfile
+from timeit import default_timer
+
+from acwx.stash import SQLiteStash, StashCache, WriteBehindStash
+
+
+def write_latency(stash, writes, keys):
+    latency = []
+    for i in range(writes):
+        t0 = default_timer()
+        stash.set("layout.col{}".format(i % keys), json.dumps([i, i+1, i+2]))
+        latency.append(default_timer() - t0)
+    return latency
+
+
+def bench_writes(path, writes, keys, delay):
+    results = []
+    db = SQLiteStash(path)
+    latency = write_latency(db, writes, keys)
+    results.append(dict(mode="sync", writes=writes, keys=keys,
+                        write_us_p50=1e6*percentile(latency, 50), write_us_p95=1e6*percentile(latency, 95),
+                        total_s=sum(latency)))
+
+    wb = WriteBehindStash(db, delay=delay)
+    latency = write_latency(wb, writes, keys)
+    t0 = default_timer()
+    wb.close()
+    results.append(dict(mode="write-behind", writes=writes, keys=keys, delay=delay,
+                        write_us_p50=1e6*percentile(latency, 50), write_us_p95=1e6*percentile(latency, 95),
+                        total_s=sum(latency), close_s=default_timer() - t0, stats=wb.stats))
+    db.close()
+    return results
+
+
+def bench_reads(path, reads, keys):
+    db = SQLiteStash(path)
+    db.set_many(dict( ("layout.col{}".format(i), json.dumps(list(range(20)))) for i in range(keys) ))
+    results = []
+    for mode in ("direct", "cached", "preloaded"):
+        if mode == "direct":
+            get = lambda key: json.loads(db.get(key))
+        else:
+            cache = StashCache(db)
+            if mode == "preloaded":
+                cache.preload("layout.")
+            get = cache.get_json
+        t0 = default_timer()
+        for i in range(reads):
+            get("layout.col{}".format(i % keys))
+        results.append(dict(mode=mode, reads=reads, keys=keys, read_us=1e6*(default_timer() - t0)/reads))
+    db.close()
+    return results
+
+
+def main():
+    parser = arg_parser(__doc__.split("\n")[0])
+    parser.add_argument("--writes", type=int, default=2000, help="writes per measurement")
+    parser.add_argument("--reads", type=int, default=100000, help="reads per measurement")
+    parser.add_argument("--keys", type=int, default=10, help="distinct keys")
+    parser.add_argument("--delay", type=float, default=0.25, help="write-behind debounce delay")
+    args = parser.parse_args()
+    writes = 200 if args.quick else args.writes
+    reads  = 2000 if args.quick else args.reads
+
+    tmp = tempfile.mkdtemp()
+    try:
+        results = dict(
+            writes = bench_writes(os.path.join(tmp, "writes.db"), writes, args.keys, args.delay),
+            reads  = bench_reads(os.path.join(tmp, "reads.db"), reads, args.keys),
+        )
+    finally:
+        shutil.rmtree(tmp)
+    write_results("stash", args, results)
+
+if __name__ == '__main__':
+    main()
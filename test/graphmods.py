@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Access to the wx-free modules of acwx.wx.graph
+
+Importing C{acwx.wx.graph} (through C{acwx.wx}) requires wxPython and
+matplotlib's WX backend. The data side of the graphs (storage, series,
+decimation, ingestion, loading and shared rings) needs neither, so the
+tests load those modules as submodules of a bare package sharing the
+directory of C{acwx.wx.graph}.
+"""
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import importlib, os, sys, types
+import acwx
+
+PACKAGE = str('_acwx_graph')
+
+if PACKAGE not in sys.modules:
+    _package = types.ModuleType(PACKAGE)
+    _package.__path__ = [ os.path.join(os.path.dirname(acwx.__file__), 'wx', 'graph') ]
+    sys.modules[PACKAGE] = _package
+
+
+def load(name):
+    """The module acwx.wx.graph.<name> (which must not import wx)"""
+    return importlib.import_module(str("{}.{}".format(PACKAGE, name)))
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import math
+import unittest
+
+from graphmods import load
+autoscale = load('autoscale')
+QuantizedScale = autoscale.QuantizedScale
+nice_step = autoscale.nice_step
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class NiceStepTest(unittest.TestCase):
+    def test_steps(self):
+        for raw, step in ((1, 1), (1.5, 2), (2.4, 2.5), (3, 5), (7, 10),
+                          (100, 100), (0.07, 0.1), (0.021, 0.025)):
+            self.assertAlmostEqual(nice_step(raw), step)
+
+    def test_degenerate(self):
+        self.assertEqual(nice_step(0), 1)
+        self.assertEqual(nice_step(-3), 1)
+
+
+class QuantizedScaleTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.scale = QuantizedScale(clock=self.clock)
+
+    def test_initial(self):
+        # span 10 + 10% headroom each side => step 2.5
+        self.assertEqual(self.scale(0, 10), (-2.5, 12.5))
+
+    def test_grow(self):
+        self.scale(0, 10)
+        # Growth is immediate and rounds out to the new (coarser) step
+        self.assertEqual(self.scale(0, 13), (-5, 15))
+        self.assertEqual(self.scale(-20, 11), (-30, 20))
+
+    def test_within_limits(self):
+        self.scale(0, 10)
+        for _ in range(5):
+            self.clock.now += 10
+            self.assertEqual(self.scale(0.5, 9.5), (-2.5, 12.5))
+        self.assertIsNone(self.scale._shrink_since)
+
+    def test_shrink_delay(self):
+        self.scale(0, 10)
+        self.assertEqual(self.scale(1, 9), (-2.5, 12.5))
+        self.clock.now = 1.9
+        self.assertEqual(self.scale(1, 9), (-2.5, 12.5))
+        self.clock.now = 2.0
+        self.assertEqual(self.scale(1, 9), (0, 10))
+
+    def test_shrink_interrupted(self):
+        self.scale(0, 10)
+        self.scale(1, 9)
+        self.clock.now = 1.5
+        self.scale(0, 10)               # back to the current limits
+        self.clock.now = 2.5
+        self.assertEqual(self.scale(1, 9), (-2.5, 12.5))
+        self.clock.now = 4.5
+        self.assertEqual(self.scale(1, 9), (0, 10))
+
+    def test_non_finite(self):
+        self.scale(0, 10)
+        for lo, hi in ((float('nan'), 5), (0, float('inf')), (None, 5)):
+            out = self.scale(lo, hi)
+            self.assertIs(out[0], lo)
+            self.assertIs(out[1], hi)
+        self.assertEqual((self.scale.lo, self.scale.hi), (-2.5, 12.5))
+        self.assertEqual(self.scale(0, 10), (-2.5, 12.5))
+
+    def test_flat(self):
+        lo, hi = self.scale(5, 5)
+        self.assertTrue(lo < 5 < hi)
+        self.assertTrue(math.isinf(self.scale(float('-inf'), 5)[0]))
+
+    def test_reset(self):
+        self.scale(0, 100)
+        self.scale.reset()
+        self.assertEqual(self.scale(0, 10), (-2.5, 12.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import unittest
+import numpy
+
+from graphmods import load
+decimate = load('decimate')
+lod      = load('lod')
+Series   = load('series').Series
+
+
+def data(n=10000):
+    X = numpy.arange(n, dtype=float)
+    return X, numpy.sin(X / 37) + numpy.cos(X / 5)
+
+
+class M4Test(unittest.TestCase):
+    def test_envelope(self):
+        X, Y = data()
+        DX, DY = decimate.m4(X, Y, 100)
+        self.assertLessEqual(len(DX), 400)
+        self.assertEqual((DX[0], DX[-1]), (X[0], X[-1]))
+        self.assertEqual((DY.min(), DY.max()), (Y.min(), Y.max()))
+        # Each pixel column keeps its extremes
+        for a in range(0, 10000, 1000):
+            column = (DX >= a) & (DX < a + 100)
+            self.assertEqual(DY[column].max(), Y[a:a+100].max())
+            self.assertEqual(DY[column].min(), Y[a:a+100].min())
+
+    def test_small(self):
+        X, Y = data(100)
+        self.assertIs(decimate.m4(X, Y, 100)[0], X)
+
+    def test_nan(self):
+        X, Y = data()
+        Y[:200] = numpy.nan
+        DX, DY = decimate.m4(X, Y, 100)
+        self.assertEqual(numpy.nanmax(DY), Y[200:].max())
+
+
+class LTTBTest(unittest.TestCase):
+    def test_threshold(self):
+        X, Y = data()
+        DX, DY = decimate.lttb(X, Y, 500)
+        self.assertLessEqual(len(DX), 500)
+        self.assertEqual((DX[0], DX[-1]), (X[0], X[-1]))
+        self.assertTrue((numpy.diff(DX) > 0).all())
+        self.assertTrue(set(DY.tolist()) <= set(Y.tolist()))
+
+
+class LODPyramidTest(unittest.TestCase):
+    def test_select(self):
+        X, Y = data(100000)
+        pyramid = lod.LODPyramid(4)
+        pyramid.extend(X[:50001], Y[:50001])
+        for x, y in zip(X[50001:], Y[50001:]):
+            pyramid.append(x, y)
+
+        DX, DY = pyramid.select(0, X[-1], 100)
+        self.assertLess(len(DX), len(X) // 10)
+        self.assertEqual((DY.min(), DY.max()), (Y.min(), Y.max()))
+        self.assertGreater(DX[-1], X[-1] - 4)# Newest (finest) block reached
+
+    def test_too_fine(self):
+        X, Y = data(1000)
+        pyramid = lod.LODPyramid(4)
+        pyramid.extend(X, Y)
+        self.assertIsNone(pyramid.select(0, 10, 100))
+
+    def test_drop_before(self):
+        X, Y = data(100000)
+        pyramid = lod.LODPyramid(4)
+        pyramid.extend(X, Y)
+        pyramid.drop_before(50001)
+        DX, DY = pyramid.select(0, X[-1], 100)
+        # Nothing from the dropped data, and the straddling coarse
+        # aggregates are filled in from the finer levels
+        self.assertGreaterEqual(DX.min(), 50001)
+        self.assertLess(DX[0], 50001 + 4)
+        self.assertTrue((numpy.diff(DX) >= 0).all())
+        self.assertEqual((DY.min(), DY.max()), (Y[50004:].min(), Y[50004:].max()))
+
+    def test_series_retention(self):
+        rng = numpy.random.RandomState(8)
+        s = Series("a", lod=4, max_points=20000)
+        x = 0
+        for _ in range(50):
+            n = rng.randint(1, 5000)
+            s.extend(numpy.arange(x, x+n, dtype=float), rng.randn(n))
+            x += n
+            X, Y = s.display_data(100, s.X[0], s.X[-1])
+            self.assertGreaterEqual(X.min(), s.X[0])
+            self.assertLessEqual(X.max(), s.X[-1])
+            self.assertGreaterEqual(Y.min(), min(s.Y))
+            self.assertLessEqual(Y.max(), max(s.Y))
+
+
+class DisplayDataTest(unittest.TestCase):
+    def test_decimated(self):
+        s = Series("a", decimate='m4')
+        s.extend(*data())
+        X, Y = s.display_data(100)
+        self.assertLessEqual(len(X), 400)
+        self.assertIs(s.display_data(100)[0], X)# Cached
+
+        X, Y = s.display_data(100, 1000, 2000)
+        self.assertLessEqual(X[0], 1000)
+        self.assertGreaterEqual(X[-1], 2000)
+        self.assertLessEqual(len(X), 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import unittest
+
+try:
+    import wx
+except ImportError:
+    wx = None
+else:
+    from acwx.wx.graph.graph import _GraphCore, GraphPanel
+
+
+class Grid(object):
+    """Stand-in for the widget side of a graph without frame rate cap"""
+    max_fps = None
+
+    def __init__(self):
+        self.redraws = []
+
+    def request_redraw(self, panel=None):
+        self.redraws.append(panel)
+
+
+def core_graph():
+    graph = type(str('CoreGraph'), (Grid, _GraphCore), {})()
+    graph.init_graph()
+    return graph
+
+
+def push(graph, i, x, y):
+    buf = graph.producer(i)
+    buf.wakeup = None# Called from the tests, not via wx.CallAfter
+    buf.push(x, y)
+
+
+@unittest.skipIf(wx is None, "wxPython is required")
+class ProducerWakeupTest(unittest.TestCase):
+    def test_graph(self):
+        graph = core_graph()
+        graph.add_series("a")
+        push(graph, 0, 1.0, 2.0)
+        graph.on_ingest_wakeup()
+        self.assertEqual(len(graph.series[0]), 1)
+        self.assertEqual(graph.redraws, [None])
+        graph.on_ingest_wakeup()# Nothing pending
+        self.assertEqual(len(graph.redraws), 1)
+
+    def test_panel(self):
+        grid = Grid()
+        panel = GraphPanel(grid, (1, 1, 1))
+        panel.add_series("a")
+        push(panel, 0, 1.0, 2.0)
+        panel.on_ingest_wakeup()
+        self.assertEqual(grid.redraws, [panel])
+
+
+@unittest.skipIf(wx is None, "wxPython is required")
+class AttachSourceTest(unittest.TestCase):
+    def test_requires_max_fps(self):
+        graph = core_graph()
+        graph.add_series("a")
+        source = object()
+        self.assertRaises(ValueError, graph.attach_source, 0, source)
+        self.assertIsNone(graph.series[0].inbox)
+
+        graph.max_fps = 30
+        graph.attach_source(0, source)
+        self.assertIs(graph.series[0].inbox, source)
+        self.assertRaises(ValueError, graph.producer, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import threading, unittest
+import numpy
+
+from graphmods import load
+ingest = load('ingest')
+
+
+class IngestBufferTest(unittest.TestCase):
+    def test_drain_order(self):
+        buf = ingest.IngestBuffer()
+        buf.push(0, 0)
+        buf.push_many([1, 2], [1, 2])
+        buf.push(3, 3)
+        X, Y = buf.drain()
+        self.assertEqual(list(X), [0, 1, 2, 3])
+        self.assertEqual(len(buf), 0)
+        self.assertEqual(len(buf.drain()[0]), 0)
+
+    def test_maxlen(self):
+        buf = ingest.IngestBuffer(maxlen=3)
+        self.assertEqual(buf.push_many(numpy.arange(5.), numpy.arange(5.)), 3)
+        self.assertFalse(buf.push(9, 9))
+        self.assertEqual(buf.stats['dropped'], 3)
+        self.assertEqual(buf.backpressure, 1)
+
+    def test_push_many_copies(self):
+        buf = ingest.IngestBuffer()
+        xs = numpy.arange(4.)
+        buf.push_many(xs, xs)
+        xs[:] = -1
+        self.assertEqual(list(buf.drain()[0]), [0, 1, 2, 3])
+
+    def test_wakeup(self):
+        wakeups = []
+        buf = ingest.IngestBuffer(wakeup=lambda: wakeups.append(1))
+        buf.push(0, 0)
+        buf.push(1, 1)
+        buf.drain()
+        buf.push_many([2], [2])
+        self.assertEqual(len(wakeups), 2)
+
+    def test_threads(self):
+        buf = ingest.IngestBuffer()
+        def produce(k):
+            for i in range(1000):
+                buf.push(k, i)
+        threads = [ threading.Thread(target=produce, args=(k,)) for k in range(4) ]
+        for t in threads:
+            t.start()
+        drained = 0
+        while any(t.is_alive() for t in threads):
+            drained += len(buf.drain()[0])
+        for t in threads:
+            t.join()
+        drained += len(buf.drain()[0])
+        self.assertEqual(drained, 4000)
+
+
+if __name__ == '__main__':
+    unittest.main()
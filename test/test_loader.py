@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import os, shutil, tempfile, threading, time, unittest
+import numpy
+
+from graphmods import load
+loader = load('loader')
+IngestBuffer = load('ingest').IngestBuffer
+Series = load('series').Series
+
+
+class Graph(object):
+    """The producer side of a RealtimeGraph, drained by a thread"""
+    def __init__(self, n=1):
+        self.series = [ Series(str(i)) for i in range(n) ]
+
+    def producer(self, i, maxlen=None):
+        series = self.series[i]
+        if series.inbox is None:
+            series.inbox = IngestBuffer(maxlen)
+        return series.inbox
+
+    def drain(self, stop, delay=0.001):
+        while True:
+            finished = stop.is_set()
+            for series in self.series:
+                series.extend(*series.inbox.drain())
+            if finished:
+                return
+            time.sleep(delay)
+
+
+class LoaderTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.data = numpy.column_stack((numpy.arange(1000.), numpy.arange(1000.)**2, -numpy.arange(1000.)))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_csv_chunks(self):
+        path = self.path("data.csv")
+        with open(path, 'w') as fh:
+            fh.write("x,y,z\n")
+            numpy.savetxt(fh, self.data, delimiter=',', fmt='%g')
+        progress = []
+        chunks = list(loader.csv_chunks(path, chunk=10, skiprows=1, progress=progress.append))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue((numpy.concatenate(chunks) == self.data).all())
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 1.0)
+
+    def test_npy_chunks(self):
+        path = self.path("data.npy")
+        numpy.save(path, self.data)
+        progress = []
+        chunks = list(loader.npy_chunks(path, chunk=300, progress=progress.append))
+        self.assertEqual([ len(c) for c in chunks ], [300, 300, 300, 100])
+        self.assertTrue((numpy.concatenate(chunks) == self.data).all())
+        self.assertEqual(progress, [0.3, 0.6, 0.9, 1.0])
+
+        numpy.save(path, numpy.arange(5.))
+        self.assertRaises(ValueError, list, loader.npy_chunks(path))
+
+    def test_backpressure(self):
+        path = self.path("data.npy")
+        numpy.save(path, self.data)
+        graph = Graph(2)
+        done = []
+        stream = loader.StreamLoader(graph, path, series=(0, 1), chunk=64, maxlen=16,
+                                     done=done.append, call_after=lambda f, *args: f(*args))
+        self.assertEqual(graph.series[0].decimate, 'm4')
+        stop = threading.Event()
+        drainer = threading.Thread(target=graph.drain, args=(stop,))
+        drainer.start()
+        stream.start()
+        stream.join(10)
+        stop.set()
+        drainer.join(10)
+
+        self.assertEqual(done, [stream])
+        self.assertIsNone(stream.error)
+        self.assertEqual(stream.points, 1000)
+        self.assertEqual(stream.progress, 1.0)
+        for series, col in zip(graph.series, (1, 2)):
+            self.assertLessEqual(series.inbox.stats['high_water'], 16)
+            self.assertEqual(list(series.X), list(self.data[:,0]))
+            self.assertEqual(list(series.Y), list(self.data[:,col]))
+
+    def test_cancel(self):
+        path = self.path("data.npy")
+        numpy.save(path, self.data)
+        graph = Graph()
+        done = []
+        stream = loader.StreamLoader(graph, path, chunk=10, maxlen=4,
+                                     done=done.append, call_after=lambda f, *args: f(*args))
+        stream.start()                  # Stalls on the full buffer, nobody drains
+        time.sleep(0.05)
+        stream.cancel()
+        stream.join(10)
+        self.assertFalse(stream.is_alive())
+        self.assertEqual(done, [stream])
+        self.assertLess(stream.points, 1000)
+        self.assertLessEqual(len(graph.series[0].inbox), 4)
+
+    def test_error(self):
+        graph = Graph()
+        done = []
+        stream = loader.StreamLoader(graph, self.path("missing.csv"),
+                                     done=done.append, call_after=lambda f, *args: f(*args))
+        stream.run()
+        self.assertEqual(done, [stream])
+        self.assertIsInstance(stream.error, EnvironmentError)
+
+
+if __name__ == '__main__':
+    unittest.main()
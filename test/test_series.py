@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import random, unittest
+import numpy
+
+from graphmods import load
+series = load('series')
+Series = series.Series
+
+
+class SlidingExtremaTest(unittest.TestCase):
+    def test_window(self):
+        rnd = random.Random(1)
+        values = [ rnd.uniform(-1, 1) for _ in range(200) ]
+        ext = series._SlidingExtrema()
+        ext.push_many(0, numpy.array(values[:100]))
+        for i in range(100, 200):
+            ext.push(i, values[i])
+            ext.evict(i - 20)
+            window = values[i-20:i+1]
+            self.assertEqual(ext.min, min(window))
+            self.assertEqual(ext.max, max(window))
+
+    def test_nan(self):
+        ext = series._SlidingExtrema()
+        ext.push_many(0, numpy.array([float('nan'), 2.0, float('nan')]))
+        ext.push(3, float('nan'))
+        self.assertEqual((ext.min, ext.max), (2.0, 2.0))
+        ext.evict(2)
+        self.assertFalse(ext)
+
+
+class SeriesTest(unittest.TestCase):
+    def test_sliding_extents(self):
+        s = Series("a")
+        for x, y in enumerate([5, 1, 4, 2, 3]):
+            s.add_point(float(x), float(y))
+        s.trim_to_count(3)
+        self.assertEqual((s.xmin, s.xmax, s.ymin, s.ymax), (2, 4, 2, 4))
+
+    def test_emptied_bbox(self):
+        s = Series("a")
+        for x in range(5):
+            s.add_point(float(x), float(x))
+        s.trim_to_count(0)
+        box = [None]*4
+        s.update_bbox(box)
+        self.assertEqual(box, [None]*4)
+
+        # Minimal box around the new point, nothing left of the old extents
+        s.add_point(10.0, -1.0)
+        box = [None]*4
+        s.update_bbox(box)
+        self.assertEqual(box, [10.0 - s.min_width/2, -1.0 - s.min_height/2,
+                               10.0 + s.min_width/2, -1.0 + s.min_height/2])
+
+    def test_trim_to_domain(self):
+        s = Series("a")
+        s.extend(numpy.arange(10.), numpy.arange(10.)[::-1])
+        s.trim_to_domain(2, 5)
+        self.assertEqual(list(s.X), [2, 3, 4, 5])
+        self.assertEqual((s.ymin, s.ymax), (4, 7))
+
+    def test_retention(self):
+        s = Series("a", max_points=5, max_age=3)
+        for x in range(10):
+            s.add_point(float(x), float(x))
+        self.assertEqual(list(s.X), [6, 7, 8, 9])
+        s = Series("b", max_points=3)
+        for x in range(10):
+            s.add_point(float(x), float(x))
+        self.assertEqual(list(s.X), [7, 8, 9])
+
+    def test_extend(self):
+        s = Series("a", capacity=4)
+        s.extend([0, 1, 2], [3, 9, 1])
+        s.extend(numpy.array([3., 4.]), numpy.array([5., 6.]))
+        s.recompute_bbox()
+        self.assertEqual(list(s.X), [1, 2, 3, 4])
+        self.assertEqual((s.ymin, s.ymax), (1, 9))
+        self.assertRaises(ValueError, s.extend, [1, 2], [1])
+
+    def test_extend_unsorted(self):
+        s = Series("a")
+        s.extend([3., 1., 2.], [0., 0., 0.])
+        s.add_point(0.5, 1.0)
+        s.recompute_bbox()
+        self.assertEqual((s.xmin, s.xmax), (0.5, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
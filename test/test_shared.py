@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import os, shutil, tempfile, unittest
+import numpy
+
+from graphmods import load
+shared = load('shared')
+
+
+class SharedRingTest(unittest.TestCase):
+    def setUp(self):
+        self.dir  = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'ring')
+        self.rings = []
+
+    def tearDown(self):
+        for ring in self.rings:
+            ring.close()
+        shutil.rmtree(self.dir)
+
+    def writer(self, capacity):
+        ring = shared.SharedRingWriter(self.path, capacity)
+        self.rings.append(ring)
+        return ring
+
+    def restart(self, old, capacity):
+        old.close()
+        self.rings.remove(old)
+        return self.writer(capacity)
+
+    def reader(self, **kwargs):
+        ring = shared.SharedRingReader(self.path, **kwargs)
+        self.rings.append(ring)
+        return ring
+
+    def test_drain(self):
+        w = self.writer(8)
+        w.append(0, 0)
+        r = self.reader()
+        w.extend(numpy.arange(1., 4.), numpy.arange(1., 4.))
+        self.assertEqual(len(r), 4)
+        self.assertEqual(list(r.drain()[0]), [0, 1, 2, 3])
+        self.assertEqual(len(r.drain()[0]), 0)
+        self.assertEqual(len(self.reader(backfill=False)), 0)
+
+    def test_lapped(self):
+        w = self.writer(8)
+        r = self.reader()
+        w.extend(numpy.arange(20.), numpy.arange(20.))
+        self.assertEqual(list(r.drain()[0]), list(range(12, 20)))
+        self.assertEqual(r.stats['lost'], 12)
+
+    def test_write_in_flight(self):
+        w = self.writer(8)
+        r = self.reader()
+        w.extend(numpy.arange(8.), numpy.arange(8.))
+        # Writer announced two more points (overwriting slots 0, 1), not yet published
+        w.header[shared.H_WRITING] = 10
+        X, Y = r.drain()
+        self.assertEqual(list(X), list(range(2, 8)))
+        self.assertEqual(r.stats['lost'], 2)
+
+    def test_restart(self):
+        w = self.writer(128)
+        r = self.reader()
+        w.extend(numpy.arange(100.), numpy.arange(100.))
+        r.drain()
+        w = self.restart(w, 128)
+        w.extend(numpy.arange(100.), numpy.arange(100.))
+        self.assertEqual(len(r), 100)
+        self.assertEqual(len(r.drain()[0]), 100)
+        self.assertEqual(r.stats['restarts'], 1)
+
+    def test_capacity_change(self):
+        w = self.writer(8)
+        r = self.reader()
+        w.extend(numpy.arange(8.), numpy.arange(8.))
+        r.drain()
+        w = self.restart(w, 32)
+        w.extend(numpy.arange(20.), -numpy.arange(20.))
+        X, Y = r.drain()
+        self.assertEqual(r.capacity, 32)
+        self.assertEqual(list(Y), list(-numpy.arange(20.)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import gc, unittest
+
+from acwx.stash import StashCache, WriteBehindStash, SQLiteStash
+
+
+class CountingStash(SQLiteStash):
+    def __init__(self):
+        super(CountingStash,self).__init__()
+        self.gets = 0
+
+    def get(self, key, dflt=None):
+        self.gets += 1
+        return super(CountingStash,self).get(key, dflt)
+
+
+class StashCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.db = CountingStash()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_read_through(self):
+        self.db.set('a', '1')
+        cache = StashCache(self.db)
+        self.assertEqual((cache.get('a'), cache.get('a'), cache.get('b', 'x')), ('1', '1', 'x'))
+        cache.get('b')
+        self.assertEqual(self.db.gets, 2)
+        cache.set('b', '2')
+        self.assertEqual((self.db.get('b'), cache.get('b')), ('2', '2'))
+
+    def test_json_copies(self):
+        cache = StashCache(self.db)
+        cache.set_json('a', dict(x=[1, 2]))
+        value = cache.get_json('a')
+        value['x'].append(3)
+        self.assertEqual(cache.get_json('a'), dict(x=[1, 2]))
+        cache.set_json('a', [5])
+        self.assertEqual(cache.get_json('a'), [5])
+
+    def test_preload(self):
+        self.db.set_many({ 'ns.a': '1', 'ns.b': '2', 'other': '3' })
+        cache = StashCache(self.db)
+        self.assertEqual(cache.preload('ns.'), 2)
+        self.assertEqual((cache.get('ns.a'), cache.get('ns.missing')), ('1', None))
+        self.assertEqual(self.db.gets, 0)
+
+    def test_invalidate(self):
+        cache = StashCache(self.db)
+        cache.preload('ns.')
+        self.db.set('ns.new', '1')# Behind the cache's back
+        self.assertIsNone(cache.get('ns.new'))
+        cache.invalidate('ns.')
+        self.assertEqual(cache.get('ns.new'), '1')
+
+    def test_shared(self):
+        cache = StashCache.of(self.db)
+        self.assertIs(StashCache.of(self.db), cache)
+        self.assertIs(StashCache.of(cache), cache)
+
+        db = SQLiteStash()
+        StashCache.of(db)
+        n = len(StashCache._shared)
+        db.close()
+        del db
+        gc.collect()
+        self.assertEqual(len(StashCache._shared), n - 1)
+
+    def test_plain_stash(self):
+        class SlotStash(object):# Not weakly referenceable
+            __slots__ = ('values',)
+            def __init__(self):
+                self.values = dict()
+            def get(self, key, dflt=None):
+                return self.values.get(key, dflt)
+            def set(self, key, value):
+                self.values[key] = value
+
+        class DictStash(dict):# Not hashable
+            def set(self, key, value):
+                self[key] = value
+
+        for stash in (SlotStash(), DictStash()):
+            cache = StashCache.of(stash)
+            self.assertIs(StashCache.of(stash), cache)
+            cache.set('a', '1')
+            self.assertEqual(cache.get('a'), '1')
+
+
+class WriteBehindStashTest(unittest.TestCase):
+    def test_flush(self):
+        db = SQLiteStash()
+        wb = WriteBehindStash(db, delay=60)
+        wb.set('a', '1')
+        wb.set('a', '2')
+        self.assertEqual((wb.get('a'), db.get('a')), ('2', None))
+        self.assertEqual(wb.prefixed(''), dict(a='2'))
+        self.assertEqual(wb.close(), 1)
+        self.assertEqual(db.get('a'), '2')
+        self.assertEqual(wb.stats['coalesced'], 1)
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
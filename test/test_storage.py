@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import os, shutil, tempfile, unittest
+import numpy
+
+from graphmods import load
+storage = load('storage')
+Series  = load('series').Series
+
+
+class ListStorageTest(unittest.TestCase):
+    def test_drop_and_keep(self):
+        s = storage.ListStorage()
+        for i in range(10):
+            s.append(float(i), float(-i))
+        s.drop(3)
+        self.assertEqual(len(s), 7)
+        self.assertEqual(s.x_at(0), 3.0)
+        self.assertEqual(s.search(5.0), 2)
+        self.assertEqual(s.search(5.0, 'right'), 3)
+        s.keep(1, 4)
+        self.assertEqual(list(s.X), [4.0, 5.0, 6.0])
+        self.assertEqual(list(s.Y), [-4.0, -5.0, -6.0])
+
+    def test_read_does_not_compact(self):
+        s = storage.ListStorage(X=list(range(10)), Y=list(range(10)))
+        s.drop(2)
+        self.assertEqual(s.X, list(range(2, 10)))
+        self.assertEqual(s.Y, list(range(2, 10)))
+        self.assertEqual(s._start, 2)
+        s.drop(3)# Half of the lists dead
+        self.assertEqual(s._start, 0)
+        self.assertIs(s.X, s._x)
+
+
+class ArrayStorageTest(unittest.TestCase):
+    def test_copies(self):
+        s = storage.ArrayStorage('float32', X=[1, 2, 3], Y=[4, 5, 6])
+        self.assertEqual(s.X.dtype, numpy.float32)
+        self.assertIs(s.X, s.X)
+        s.keep(0, 2)
+        s.append(9, 9)
+        self.assertEqual(list(s.X), [1, 2, 9])
+        s.drop(2)
+        self.assertEqual(list(s.Y), [9])
+
+    def test_series(self):
+        s = Series("a", dtype='float32')
+        self.assertFalse(hasattr(s, '__dict__'))
+        s.extend(numpy.arange(5.), numpy.arange(5.))
+        s.trim_to_count(2)
+        self.assertEqual(list(s.X), [3, 4])
+        self.assertRaises(ValueError, storage.ArrayStorage, 'int32')
+
+
+class RingStorageTest(unittest.TestCase):
+    def test_wraps(self):
+        s = storage.RingStorage(4)
+        for i in range(6):
+            s.append(float(i), float(i))
+        self.assertEqual(list(s.X), [2, 3, 4, 5])
+        s.extend(numpy.array([6., 7.]), numpy.array([0., 0.]))
+        self.assertEqual(list(s.X), [4, 5, 6, 7])
+        s.extend(numpy.arange(10.), numpy.arange(10.))
+        self.assertEqual(list(s.X), [6, 7, 8, 9])
+        s.keep(1, 3)
+        self.assertEqual(list(s.X), [7, 8])
+        self.assertEqual(s.search(8), 1)
+
+    def test_series_capacity(self):
+        s = Series("a", capacity=3)
+        for x, y in enumerate([9, 1, 2, 3]):
+            s.add_point(float(x), float(y))
+        self.assertEqual(list(s.Y), [1, 2, 3])
+        s.recompute_bbox()
+        self.assertEqual((s.ymin, s.ymax), (1, 3))
+
+
+class MemmapStorageTest(unittest.TestCase):
+    def setUp(self):
+        self.dir  = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'series.rec')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def recording(self, n=20, **kwargs):
+        s = storage.MemmapStorage(self.path, reserve=8, **kwargs)
+        s.extend(numpy.arange(n, dtype=float), numpy.arange(n, dtype=float))
+        s.flush()
+        return s
+
+    def test_reopen(self):
+        self.recording(dtype='float32')
+        s = storage.MemmapStorage(self.path)
+        self.assertEqual(len(s), 20)
+        self.assertEqual(s.dtype, numpy.float32)
+        s.append(20, 20)
+        self.assertEqual(len(storage.MemmapStorage(self.path, readonly=True)), 21)
+
+    def test_keep_leaves_recording(self):
+        s = self.recording()
+        s.keep(5, 10)
+        self.assertEqual(list(s.X), [5, 6, 7, 8, 9])
+        self.assertEqual(s.x_at(0), 5)
+        self.assertEqual(len(storage.MemmapStorage(self.path, readonly=True)), 20)
+
+        # Appending follows the recording again
+        s.append(20, 20)
+        self.assertEqual(list(s.X), list(range(5, 21)))
+
+    def test_keep_readonly(self):
+        self.recording()
+        s = storage.MemmapStorage(self.path, readonly=True)
+        s.keep(2, 4)
+        self.assertEqual(list(s.X), [2, 3])
+        s.reset_window()
+        self.assertEqual(len(s), 20)
+
+    def test_series(self):
+        self.recording()
+        s = Series("a", storage=storage.MemmapStorage(self.path))
+        s.trim_to_domain(5, 9)
+        s.add_point(20.0, 30.0)
+        self.assertEqual(len(s), 16)
+        self.assertEqual((s.xmin, s.xmax, s.ymin, s.ymax), (5, 20, 5, 30))
+
+    def test_not_a_recording(self):
+        with open(self.path, 'wb') as fh:
+            fh.write(b'x' * 100)
+        self.assertRaises(ValueError, storage.MemmapStorage, self.path)
+        self.assertRaises(IOError, storage.MemmapStorage, self.path + '.missing', readonly=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import gc, threading, time, unittest
+
+from acwx.util import LRUCache, memoize, cached_property, locked_cached_property, slot_cached_property, invalidate, populated_caches
+
+
+class Derived(object):
+    __slots__ = 'base _norm __dict__'.split()
+
+    def __init__(self):
+        self.base = 3
+
+    @cached_property(depends='base')
+    def doubled(self):
+        return 2*self.base
+
+    @cached_property(depends='doubled')
+    def quadrupled(self):
+        return 2*self.doubled
+
+    @slot_cached_property(depends='base')
+    def norm(self):
+        return abs(self.base)
+
+
+class InvalidateTest(unittest.TestCase):
+    def test_invalidate(self):
+        obj = Derived()
+        self.assertEqual(obj.quadrupled, 12)
+        self.assertEqual(populated_caches(obj), ['doubled', 'quadrupled'])
+        obj.base = 5
+        invalidate(obj, 'base')
+        self.assertEqual(populated_caches(obj), [])
+        self.assertEqual(obj.quadrupled, 20)
+
+    def test_assign(self):
+        obj = Derived()
+        obj.quadrupled
+        obj.doubled = 1
+        self.assertEqual(obj.quadrupled, 2)
+        del obj.doubled
+        self.assertEqual(populated_caches(obj), [])
+
+    def test_slot(self):
+        obj = Derived()
+        self.assertEqual(obj.norm, 3)
+        obj.base = -4
+        self.assertEqual(obj.norm, 3)
+        invalidate(obj, 'base')
+        self.assertEqual(obj.norm, 4)
+
+
+class Slow(object):
+    __slots__ = 'calls entered release _value __dict__'.split()
+
+    def __init__(self, release=None):
+        self.calls   = 0
+        self.entered = threading.Event()
+        self.release = release
+
+    def compute(self):
+        self.calls += 1
+        self.entered.set()
+        if self.release is None:
+            time.sleep(0.05)
+            return True
+        return self.release.wait(5)
+
+    @locked_cached_property
+    def locked(self):
+        return self.compute()
+
+    @slot_cached_property(slot='_value', lock=True)
+    def slotted(self):
+        return self.compute()
+
+
+def in_threads(func, n=8):
+    threads = [ threading.Thread(target=func) for _ in range(n) ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+class LockedCachedPropertyTest(unittest.TestCase):
+    def test_computed_once(self):
+        for attr in ('locked', 'slotted'):
+            obj = Slow()
+            in_threads(lambda: getattr(obj, attr))
+            self.assertEqual(obj.calls, 1, attr)
+            self.assertTrue(getattr(obj, attr))
+            # No lock left behind in the instance
+            self.assertEqual(list(vars(obj)), ['locked'] if attr == 'locked' else [])
+
+    def test_instances_independent(self):
+        # a's computation only finishes once b's value has been computed
+        for attr in ('locked', 'slotted'):
+            b = Slow()
+            a = Slow(release=b.entered)
+            t = threading.Thread(target=lambda: getattr(a, attr))
+            t.start()
+            a.entered.wait(5)
+            getattr(b, attr)
+            t.join()
+            self.assertTrue(getattr(a, attr), attr)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0
+    def __call__(self):
+        return self.now
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_evict(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual(cache.stats['evictions'], 1)
+
+    def test_ttl(self):
+        clock = Clock()
+        cache = LRUCache(ttl=10, clock=clock)
+        cache.put('a', 1)
+        clock.now = 9
+        self.assertEqual(cache.get('a'), 1)
+        clock.now = 10
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats['expirations'], 1)
+
+
+class Thing(object):
+    def __init__(self):
+        self.calls = 0
+
+    @memoize(per_instance=True)
+    def double(self, x):
+        self.calls += 1
+        return 2*x
+
+
+class MemoizeTest(unittest.TestCase):
+    def test_shared(self):
+        calls = []
+        @memoize(maxsize=2)
+        def square(x):
+            calls.append(x)
+            return x*x
+        for x in (1, 2, 1, 3, 1, 2):
+            square(x)
+        self.assertEqual(calls, [1, 2, 3, 2])
+        info = square.cache_info()
+        self.assertEqual((info['size'], info['maxsize'], info['hits']), (2, 2, 2))
+        square.cache_clear()
+        self.assertEqual(square.cache_info()['size'], 0)
+
+    def test_unhashable(self):
+        @memoize
+        def total(values):
+            return sum(values)
+        self.assertEqual(total([1, 2]), 3)
+        self.assertEqual(total.cache_info()['size'], 0)
+
+    def test_per_instance(self):
+        a, b = Thing(), Thing()
+        self.assertEqual((a.double(2), a.double(2), b.double(2)), (4, 4, 4))
+        self.assertEqual((a.calls, b.calls), (1, 1))
+        self.assertEqual(Thing.double.cache_info()['caches'], 2)
+        del a
+        gc.collect()
+        self.assertEqual(Thing.double.cache_info()['caches'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Author: Dean Serenevy  <dean@serenevy.net>
+# This software is Copyright (c) 2014 CMM, Inc.
+#
+# This program is free software: you can redistribute it and/or modify it
+# under the terms of the MIT (Expat) license.
+from __future__ import division, absolute_import, print_function, unicode_literals
+
+import unittest
+
+try:
+    import wx
+except ImportError:
+    wx = None
+else:
+    from acwx.wx.widget import GridWidget
+
+
+@unittest.skipIf(wx is None, "wxPython is required")
+class GridRowIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.app = wx.App(False)
+        except (Exception, SystemExit) as err:# No display
+            raise unittest.SkipTest(str(err) or "No display")
+
+    def setUp(self):
+        self.frame = wx.Frame(None)
+        self.grid = GridWidget(self.frame)
+
+    def tearDown(self):
+        self.frame.Destroy()
+
+    def test_show_row(self):
+        self.grid.add_grid_row("a", "b", name="top")
+        self.grid.add_grid_row("c", name="bottom")
+        self.grid.hide_row("top")
+        self.assertFalse(self.grid.get_cell("top", 0).IsShown())
+        self.assertFalse(self.grid.get_cell("top", 1).IsShown())
+        self.assertTrue(self.grid.get_cell("bottom", 0).IsShown())
+        self.assertEqual(self.grid.visible_rows(), ["bottom"])
+
+    def test_replaced_window(self):
+        self.grid.add_grid_row("a", name="top")
+        self.grid.add_grid_row("b", name="bottom")
+        self.grid.get_cell("top", 0).Destroy()
+        # Same item count as before, so only the dead reference shows the
+        # index to be stale
+        text = wx.StaticText(self.grid, wx.ID_ANY, "new")
+        self.grid.sizer.Add(text, pos=(0, 0))
+        self.grid.hide_row("top")
+        self.assertFalse(text.IsShown())
+        self.assertTrue(self.grid.get_cell("bottom", 0).IsShown())
+
+    def test_moved_window(self):
+        self.grid.add_grid_row("a", name="top")
+        self.grid.add_grid_row("b", name="bottom")
+        self.grid.add_grid_row(name="spare")
+        moved = self.grid.get_cell("top", 0)
+        self.grid.sizer.SetItemPosition(moved, (2, 0))
+        self.grid.hide_row("top")
+        self.assertTrue(moved.IsShown())
+        self.grid.hide_row("spare")
+        self.assertFalse(moved.IsShown())
+
+
+if __name__ == '__main__':
+    unittest.main()